@@ -0,0 +1,23 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.tallen116.opennms.plugins.plugin_utils.action import ONMSActionBase
+from ansible_collections.tallen116.opennms.plugins.module_utils.requisition import (
+    REQUISITION_ARGSPEC,
+    REQUISITION_MUTUALLY_EXCLUSIVE,
+    REQUISITION_REQUIRED_ONE_OF,
+    manage_requisition
+)
+
+
+class ActionModule(ONMSActionBase):
+
+    ARGUMENT_SPEC = REQUISITION_ARGSPEC
+    MUTUALLY_EXCLUSIVE = REQUISITION_MUTUALLY_EXCLUSIVE
+    REQUIRED_ONE_OF = REQUISITION_REQUIRED_ONE_OF
+
+    def run_module(self, module):
+        return manage_requisition(module)
@@ -0,0 +1,21 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.tallen116.opennms.plugins.plugin_utils.action import ONMSActionBase
+from ansible_collections.tallen116.opennms.plugins.module_utils.user import (
+    USER_ARGSPEC,
+    USER_MUTUALLY_EXCLUSIVE,
+    manage_user
+)
+
+
+class ActionModule(ONMSActionBase):
+
+    ARGUMENT_SPEC = USER_ARGSPEC
+    MUTUALLY_EXCLUSIVE = USER_MUTUALLY_EXCLUSIVE
+
+    def run_module(self, module):
+        return manage_user(module)
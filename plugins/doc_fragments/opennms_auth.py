@@ -11,7 +11,9 @@ class ModuleDocFragment(object):
     DOCUMENTATION = r'''
     options:
         onms_host:
-            description: The hostname or IP address of the OpenNMS server.
+            description:
+              - The hostname or IP address of the OpenNMS server.
+              - Requests go through the proxy of the C(http_proxy) or C(https_proxy) environment variable, unless the host is in C(no_proxy).
             type: str
             required: true
         onms_username:
@@ -28,4 +30,134 @@ class ModuleDocFragment(object):
               - Set to C(false) when certificates are not trusted.
             type: bool
             default: true
+        onms_max_connections:
+            description:
+              - The maximum keep-alive connections opened to the OpenNMS server.
+              - Connections are reused by every request the module makes.
+              - Must be at least C(1).
+            type: int
+            default: 4
+        onms_session_cache:
+            description:
+              - A directory to cache the OpenNMS session cookie in.
+              - Later tasks for the same host and user reuse the session instead of logging in again.
+              - The directory is on the host running the module, use C(delegate_to=localhost) to keep it on the controller.
+              - When not set the session is only reused by the requests of a single task.
+            type: path
+        onms_session_timeout:
+            description:
+              - The number of seconds a cached session cookie is used for.
+              - A session rejected by the server before it expires falls back to basic authentication.
+            type: int
+            default: 1800
+        onms_run_on_controller:
+            description:
+              - Send the API requests from the Ansible controller instead of the managed host.
+              - Avoids copying and starting the module on the host for every task.
+              - The controller must be able to reach I(onms_host).
+            type: bool
+            default: false
+        onms_metrics:
+            description:
+              - Return the timing and size of the API requests in C(api_metrics).
+              - Time is split into opening the connection, waiting for the first byte and reading the response.
+              - If not set, the value of the C(OPENNMS_METRICS) environment variable is used.
+            type: bool
+            default: false
+        onms_metrics_file:
+            description:
+              - Append every API request as a JSON line to this file.
+              - Enables I(onms_metrics).
+              - If not set, the value of the C(OPENNMS_METRICS_FILE) environment variable is used.
+            type: path
+        onms_dns_cache:
+            description:
+              - File caching the resolved addresses of I(onms_host) between module runs.
+              - Must be set to share the addresses between tasks, every module run is a new process.
+              - When not set the addresses are only cached by the requests of a single task.
+              - The file is on the host running the module, use C(delegate_to=localhost) to keep it on the controller.
+              - The host is only resolved when a connection is opened.
+            type: path
+        onms_dns_cache_ttl:
+            description:
+              - Number of seconds the resolved addresses are used for.
+              - The host is resolved again when none of the cached addresses can be reached.
+              - Set to C(0) to resolve the host for every connection.
+            type: int
+            default: 300
+        onms_api_cache:
+            description:
+              - File caching which v2 API endpoints I(onms_host) has between module runs.
+              - The file is on the host running the module, use C(delegate_to=localhost) to keep it on the controller.
+              - When not set the endpoints are detected again by every task.
+            type: path
+        onms_api_cache_ttl:
+            description:
+              - Number of seconds the detected v2 API endpoints are used for.
+              - Set to C(0) to detect them for every task.
+            type: int
+            default: 86400
+        onms_compression:
+            description:
+              - Ask the server to compress the responses with C(gzip) or C(deflate).
+              - Responses are decompressed while they are read.
+              - If not set, the value of the C(OPENNMS_COMPRESSION) environment variable is used.
+            type: bool
+            default: true
+        onms_compress_requests:
+            description:
+              - Compress the request bodies of at least this number of bytes with C(gzip), like large requisitions.
+              - The server must decompress requests, the C(opennms_server) role enables it in Jetty.
+              - Bodies are sent uncompressed again when the server answers C(415) or a C(400) naming a decoding failure.
+              - Set to C(0) to never compress requests.
+              - If not set, the value of the C(OPENNMS_COMPRESS_REQUESTS) environment variable is used.
+            type: int
+            default: 0
+        onms_retries:
+            description:
+              - Number of times a request is sent again after a connection error, a timeout or a C(429), C(502), C(503) or C(504) response.
+              - Only C(GET), C(HEAD), C(OPTIONS), C(PUT) and C(DELETE) requests are sent again, other requests only when the connection was refused.
+              - Set to C(0) to never send a request again.
+              - If not set, the value of the C(OPENNMS_RETRIES) environment variable is used.
+            type: int
+            default: 3
+        onms_retry_delay:
+            description:
+              - Seconds to wait before the first retry, the delay doubles for every next retry with random jitter.
+              - A C(Retry-After) header of the response replaces the delay.
+            type: float
+            default: 1.0
+        onms_retry_max_delay:
+            description:
+              - Largest number of seconds to wait between two retries.
+              - The request fails when the C(Retry-After) header of the response asks to wait longer.
+            type: float
+            default: 30.0
+        onms_max_rps:
+            description:
+              - Maximum number of requests sent to I(onms_host) every second, with bursts of the same size.
+              - The limit is shared through I(onms_throttle_file) by every module running on the same machine.
+              - Set to C(0) for no limit.
+              - If not set, the value of the C(OPENNMS_MAX_RPS) environment variable is used.
+            type: float
+            default: 0
+        onms_circuit_breaker:
+            description:
+              - Number of requests failing in a row with a connection error or a C(502), C(503) or C(504) response before the circuit opens.
+              - While the circuit is open every request to I(onms_host) fails without being sent, then a request is tried again.
+              - Set to C(0) to always send the requests.
+              - I(onms_throttle_file) is only used when this option or I(onms_max_rps) is set.
+            type: int
+            default: 0
+        onms_circuit_breaker_timeout:
+            description: Seconds the circuit stays open.
+            type: int
+            default: 30
+        onms_throttle_file:
+            description:
+              - File holding the rate limit and circuit breaker state of each host, locked while it is updated.
+              - The file is on the host running the module.
+              - Use C(delegate_to=localhost) or I(onms_run_on_controller) to share it between the forks on the controller.
+            type: path
+            default: ~/.ansible/opennms_throttle.json
     '''
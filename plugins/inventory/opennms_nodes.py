@@ -0,0 +1,229 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+    name: opennms_nodes
+    author: Timothy Allen (@tallen116)
+    short_description: OpenNMS nodes inventory source
+    version_added: "1.1.0"
+    description:
+      - Get the nodes monitored by OpenNMS as inventory hosts.
+      - Nodes, categories and IP interfaces are requested one page at a time.
+      - Hosts are grouped by category and by foreign source.
+      - With I(filters) the server only returns the matching nodes.
+      - Uses a YAML configuration file that ends with C(opennms.yml), C(opennms.yaml), C(opennms_nodes.yml) or C(opennms_nodes.yaml).
+    extends_documentation_fragment:
+      - tallen116.opennms.opennms_auth
+      - inventory_cache
+      - constructed
+    options:
+      plugin:
+        description: The name of this plugin, it should always be set to C(tallen116.opennms.opennms_nodes).
+        required: true
+        choices:
+          - tallen116.opennms.opennms_nodes
+      hostnames:
+        description: The node field used as the inventory hostname.
+        type: str
+        choices:
+          - label
+          - id
+        default: label
+      interfaces:
+        description:
+          - Request the IP interfaces of the nodes.
+          - The primary SNMP interface is used as C(ansible_host).
+          - Requires the OpenNMS v2 API.
+        type: bool
+        default: true
+      filters:
+        description:
+          - Only add the nodes matching every filter, the nodes are filtered by the server.
+          - The keys are properties of the v2 API such as C(node.label), C(node.foreignSource) or C(category.name).
+          - A value is matched for equality and can use C(*) as a wildcard, a list matches any of its values.
+          - A dict compares the property with the operators C(eq), C(ne), C(lt), C(le), C(gt) and C(ge).
+          - Requires the OpenNMS v2 API.
+        type: dict
+        default: {}
+      page_size:
+        description: The number of nodes or interfaces requested per page.
+        type: int
+        default: 500
+      category_group_prefix:
+        description: Prefix of the groups created for each category.
+        type: str
+        default: category_
+      foreign_source_group_prefix:
+        description: Prefix of the groups created for each foreign source.
+        type: str
+        default: foreign_source_
+'''
+
+EXAMPLES = r'''
+# opennms.yml
+plugin: tallen116.opennms.opennms_nodes
+onms_host: https://opennms.example.com:8443
+onms_username: inventory
+onms_password: changeme
+
+# opennms.yml with inventory caching for one hour
+plugin: tallen116.opennms.opennms_nodes
+onms_host: https://opennms.example.com:8443
+onms_username: inventory
+onms_password: changeme
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/opennms_inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: opennms_location
+    prefix: location
+
+# opennms.yml with only the servers of two requisitions
+plugin: tallen116.opennms.opennms_nodes
+onms_host: https://opennms.example.com:8443
+onms_username: inventory
+onms_password: changeme
+filters:
+  category.name: Servers
+  node.foreignSource:
+    - datacenter1
+    - datacenter2
+'''
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
+from ansible_collections.tallen116.opennms.plugins.module_utils.module import ONMSModule
+from ansible_collections.tallen116.opennms.plugins.module_utils.controller import (
+    ONMSControllerModule,
+    ONMSControllerError
+)
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'tallen116.opennms.opennms_nodes'
+
+    def verify_file(self, path):
+        """Only use files ending with the plugin name."""
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(('opennms.yml', 'opennms.yaml', 'opennms_nodes.yml', 'opennms_nodes.yaml'))
+        return False
+
+    def _get_module(self):
+        """Returns the API client for the configured OpenNMS server."""
+        params = dict((name, self.get_option(name)) for name in ONMSModule.AUTH_ARGSPEC)
+        return ONMSControllerModule({}, params)
+
+    def _fetch_nodes(self, module):
+        """Returns the nodes with their categories and IP addresses."""
+        page_size = self.get_option('page_size')
+        filters = self.get_option('filters')
+        if filters:
+            node_list = module.query('/nodes', filters=filters, key='node', page_size=page_size)
+        else:
+            node_list = module.iter_collection('/nodes', key='node', page_size=page_size, query_params={'orderBy': 'id'})
+
+        nodes = {}
+        for node in node_list:
+            nodes[str(node['id'])] = {
+                'id': str(node['id']),
+                'label': node.get('label'),
+                'foreign_source': node.get('foreignSource'),
+                'foreign_id': node.get('foreignId'),
+                'location': node.get('location'),
+                'categories': [category['name'] for category in node.get('categories') or []],
+                'ip_addresses': [],
+                'primary_ip_address': None
+            }
+
+        if self.get_option('interfaces'):
+            for interface in module.iter_collection('/ipinterfaces', page_size=page_size, query_params={'orderBy': 'id'}, version=2):
+                node = nodes.get(str(interface.get('nodeId')))
+                if node is None:
+                    continue
+                node['ip_addresses'].append(interface['ipAddress'])
+                if interface.get('snmpPrimary') == 'P':
+                    node['primary_ip_address'] = interface['ipAddress']
+
+        return {
+            'categories': [category['name'] for category in module.iter_collection('/categories', key='category', page_size=page_size)],
+            'nodes': [nodes[node_id] for node_id in sorted(nodes, key=int)]
+        }
+
+    def _populate(self, results):
+        """Add the nodes and groups to the inventory."""
+        category_prefix = self.get_option('category_group_prefix')
+        foreign_source_prefix = self.get_option('foreign_source_group_prefix')
+        strict = self.get_option('strict')
+
+        for category in results['categories']:
+            self.inventory.add_group(self._sanitize_group_name(category_prefix + category))
+
+        for node in results['nodes']:
+            host = node[self.get_option('hostnames')]
+            if not host:
+                continue
+            host = self.inventory.add_host(host)
+
+            self.inventory.set_variable(host, 'opennms_node_id', node['id'])
+            self.inventory.set_variable(host, 'opennms_label', node['label'])
+            self.inventory.set_variable(host, 'opennms_foreign_source', node['foreign_source'])
+            self.inventory.set_variable(host, 'opennms_foreign_id', node['foreign_id'])
+            self.inventory.set_variable(host, 'opennms_location', node['location'])
+            self.inventory.set_variable(host, 'opennms_categories', node['categories'])
+            self.inventory.set_variable(host, 'opennms_ip_addresses', node['ip_addresses'])
+
+            ansible_host = node['primary_ip_address']
+            if ansible_host is None and node['ip_addresses']:
+                ansible_host = node['ip_addresses'][0]
+            if ansible_host is not None:
+                self.inventory.set_variable(host, 'ansible_host', ansible_host)
+
+            for category in node['categories']:
+                group = self.inventory.add_group(self._sanitize_group_name(category_prefix + category))
+                self.inventory.add_child(group, host)
+
+            if node['foreign_source']:
+                group = self.inventory.add_group(self._sanitize_group_name(foreign_source_prefix + node['foreign_source']))
+                self.inventory.add_child(group, host)
+
+            hostvars = self.inventory.get_host(host).get_vars()
+            self._set_composite_vars(self.get_option('compose'), hostvars, host, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), hostvars, host, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, host, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        results = None
+        if attempt_to_read_cache:
+            try:
+                results = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+
+        if results is None:
+            module = None
+            try:
+                module = self._get_module()
+                results = self._fetch_nodes(module)
+            except ONMSControllerError as e:
+                raise AnsibleParserError("Unable to get the OpenNMS nodes: {0}".format(e.msg))
+            finally:
+                if module is not None:
+                    module.pool.close()
+
+        if cache_needs_update:
+            self._cache[cache_key] = results
+
+        self._populate(results)
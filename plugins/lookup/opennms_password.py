@@ -27,6 +27,65 @@ DOCUMENTATION = """
           - Salt string used for salt encryption type.
           - If not provided, the salt will be randomly generated.
         type: string
+      workers:
+        description:
+          - Number of processes used to hash the terms with salt encryption.
+          - Defaults to the number of CPUs of the controller.
+          - Set to C(1) to hash the terms one after another.
+        type: integer
+      cache:
+        description:
+          - Remember salt hashes created with a defined I(salt) string.
+          - Hashes are kept in memory and, when I(cache_key) is set, in an encrypted cache on the controller.
+          - Hashes with a random salt are never cached.
+        type: boolean
+        default: false
+        env:
+          - name: ANSIBLE_OPENNMS_PASSWORD_CACHE
+        ini:
+          - section: opennms_password_lookup
+            key: cache
+      cache_key:
+        description:
+          - Secret used to name and encrypt the cached hashes on disk.
+          - The disk cache is only used when a key is provided.
+        type: string
+        env:
+          - name: ANSIBLE_OPENNMS_PASSWORD_CACHE_KEY
+        ini:
+          - section: opennms_password_lookup
+            key: cache_key
+      cache_dir:
+        description:
+          - Directory for the disk cache.
+        type: path
+        default: ~/.ansible/opennms_password_cache
+        env:
+          - name: ANSIBLE_OPENNMS_PASSWORD_CACHE_DIR
+        ini:
+          - section: opennms_password_lookup
+            key: cache_dir
+      cache_ttl:
+        description:
+          - Number of seconds a cached hash is used for.
+        type: integer
+        default: 86400
+        env:
+          - name: ANSIBLE_OPENNMS_PASSWORD_CACHE_TTL
+        ini:
+          - section: opennms_password_lookup
+            key: cache_ttl
+      cache_size:
+        description:
+          - Maximum number of hashes kept in memory and on disk.
+          - The oldest hashes are removed first.
+        type: integer
+        default: 1000
+        env:
+          - name: ANSIBLE_OPENNMS_PASSWORD_CACHE_SIZE
+        ini:
+          - section: opennms_password_lookup
+            key: cache_size
 """
 
 EXAMPLES = """
@@ -38,6 +97,14 @@ EXAMPLES = """
   set_fact:
     opennms_password: "{{ lookup('opennms_password', 'password', encrypt='salt') }}"
 
+- name: Generate salt passwords for many users with four processes
+  set_fact:
+    opennms_passwords: "{{ query('tallen116.opennms.opennms_password', *user_passwords, encrypt='salt', workers=4) }}"
+
+- name: Generate salt password once per controller with an encrypted cache
+  set_fact:
+    opennms_password: "{{ lookup('tallen116.opennms.opennms_password', 'password', encrypt='salt', salt='changeme', cache=true, cache_key=vault_cache_key) }}"
+
 - name: Generate salt password for opennms with the a defined salt string
   set_fact:
     opennms_password: "{{ lookup('tallen116.opennms.opennms_password', 'password', encrypt='salt', salt='changeme') }}"
@@ -50,83 +117,166 @@ _raw:
   type: string
 """
 
+from collections import OrderedDict
 from hashlib import sha256
-from hashlib import md5
-import base64
-import random
+import hmac
+import json
+import os
+import time
 
 from ansible.plugins.lookup import LookupBase
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.parsing.vault import VaultLib, VaultSecret
 from ansible.utils.display import Display
+from ansible.utils.multiprocessing import context as multiprocessing_context
+from ansible_collections.tallen116.opennms.plugins.module_utils.password import (
+    SALT_SIZE,
+    HASH_ITER,
+    md5_digest,
+    generate_salt,
+    hash_salt
+)
 
 display = Display()
 
 
-SALT_SIZE = 16
-HASH_ITER = 100000
-
+def _hash_salt_worker(args):
+    """Unpacks the arguments of hash_salt for the process pool."""
+    return hash_salt(*args)
 
-def md5_digest(message):
-    """
-    This hashes a md5 password for OpenNMS users.
-    Not recommended.  Use salted hash instead.
 
+def parallel_hash_salt(jobs, workers):
     """
-    input = bytearray(message, 'utf_8')
-
-    message_digest = md5(input).digest()
-
-    return message_digest.hex().upper()
+    Runs hash_salt for every job across a process pool.
 
+    jobs = List of (message, salt_array, iter) tuples.
+    workers = The amount of processes to use.
 
-def salt_digest(message, salt_size, iter, salt_string=None):
+    The results keep the order of the jobs. The salts are generated before
+    the pool is started so random salts do not repeat between processes.
+    The processes are forked like the Ansible workers.
     """
-    This hashes a salted password for OpenNMS users.
-
-    message = The string to convert to the salt hash.
-    salt_size = The size of the salt to use.
-    iter = The amount of times to iterate using the hash.
-    salt_string = Use a predefined salt that gets hashed using MD5.
-
-    The steps taken for creating the digest
-    1. The string message is converted to byte array
-    2. A random 16 byte salt is generated
-    3. The salt bytes are added to the message (salt + message)
-    4. The sha256 hash function is applied to the salt and message
-    5. The results of the hash will be iterated 100000 times
-    6. The salt and final result of the hash are concatenated (salt + hash)
-    7. The concatenation is encoded in BASE64 and returned as a string
-
-    References
-    http://www.jasypt.org/api/jasypt/1.8/org/jasypt/util/password/StrongPasswordEncryptor.html#constructor_detail
-    https://github.com/jboss-fuse/jasypt/blob/master/jasypt/src/main/java/org/jasypt/digest/StandardStringDigester.java
-    https://github.com/jboss-fuse/jasypt/blob/master/jasypt/src/main/java/org/jasypt/digest/StandardByteDigester.java
-    https://github.com/jboss-fuse/jasypt/blob/master/jasypt/src/main/java/org/jasypt/util/password/StrongPasswordEncryptor.java
-    """
-    input = bytearray(message, 'utf_8')
-
-    if salt_string is None:
-        salt_array = bytearray()
-        for i in range(0, salt_size):
-            salt_array.append(random.randint(0, 255))
-    else:
-        _salt_md5 = md5(bytes(salt_string, 'utf_8')).digest()
-        salt_array = bytearray(_salt_md5)
-
-    salt = salt_array
+    workers = min(workers, len(jobs))
+    if workers > 1:
+        try:
+            pool = multiprocessing_context.Pool(processes=workers)
+        except (OSError, ImportError) as e:
+            # No process can be started or the platform has no semaphores
+            display.warning("Unable to hash passwords in parallel, hashing serially: %s" % e)
+        else:
+            try:
+                return pool.map(_hash_salt_worker, jobs)
+            finally:
+                pool.close()
+                pool.join()
 
-    message_digest = salt + input
+    return [hash_salt(*job) for job in jobs]
 
-    _hash = message_digest
-    for i in range(0, iter):
-        _hash = sha256(message_digest).digest()
-        message_digest = _hash
 
-    final_digest = salt_array + message_digest
+class HashCache:
+    """
+    Remembers salt hashes in memory and in an encrypted cache on disk.
 
-    message_base64 = base64.b64encode(final_digest)
+    Entries are named by a HMAC of the term, salt, algorithm and iterations
+    so the cache never reveals the password. Files on disk are encrypted with
+    ansible vault and expire after the TTL. The HMAC and vault keys are
+    derived separately from the cache key.
+    """
 
-    return message_base64.decode('utf_8')
+    # Shared by every lookup in the same process
+    _memory = OrderedDict()
+    # Names the memory only entries, does not outlive the process
+    _process_key = os.urandom(32)
+
+    def __init__(self, key=None, path=None, ttl=86400, size=1000):
+        self.ttl = ttl
+        self.size = size
+        self.path = None
+        if key is None:
+            self.key = HashCache._process_key
+        else:
+            key = to_bytes(key)
+            self.key = hmac.new(key, b'opennms_password entry name', sha256).digest()
+            vault_key = to_bytes(hmac.new(key, b'opennms_password vault secret', sha256).hexdigest())
+            self.path = os.path.expanduser(path)
+            self.vault = VaultLib([('default', VaultSecret(vault_key))])
+
+    def make_key(self, term, salt, algorithm, iterations):
+        """Returns the cache entry name for the hash options."""
+        message = json.dumps([term, salt, algorithm, iterations])
+        return hmac.new(self.key, to_bytes(message), sha256).hexdigest()
+
+    def get(self, name):
+        """Returns the cached hash or None."""
+        memory = HashCache._memory
+        if name in memory:
+            created, value = memory.pop(name)
+            if time.time() - created < self.ttl:
+                memory[name] = (created, value)
+                return value
+
+        if self.path is None:
+            return None
+
+        entry = os.path.join(self.path, name)
+        try:
+            created = os.path.getmtime(entry)
+            if time.time() - created >= self.ttl:
+                os.remove(entry)
+                return None
+            with open(entry, 'rb') as f:
+                value = to_text(self.vault.decrypt(f.read()))
+        except Exception:
+            return None
+
+        self._remember(name, created, value)
+        return value
+
+    def set(self, name, value):
+        """Caches the hash in memory and on disk."""
+        self._remember(name, time.time(), value)
+
+        if self.path is None:
+            return
+
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            entry = os.path.join(self.path, name)
+            temp = "{0}.{1}.tmp".format(entry, os.getpid())
+            fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.vault.encrypt(value))
+            os.rename(temp, entry)
+            self._evict()
+        except Exception as e:
+            display.warning("Unable to write the opennms_password cache %s: %s" % (self.path, e))
+
+    def _remember(self, name, created, value):
+        memory = HashCache._memory
+        memory.pop(name, None)
+        memory[name] = (created, value)
+        while len(memory) > self.size:
+            memory.popitem(last=False)
+
+    def _evict(self):
+        """Removes expired entries and the oldest entries over the size limit."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            try:
+                created = os.path.getmtime(entry)
+            except OSError:
+                continue
+            if now - created >= self.ttl:
+                os.remove(entry)
+            elif not name.endswith('.tmp'):
+                entries.append((created, entry))
+
+        entries.sort()
+        for created, entry in entries[:max(0, len(entries) - self.size)]:
+            os.remove(entry)
 
 
 class LookupModule(LookupBase):
@@ -141,17 +291,42 @@ class LookupModule(LookupBase):
 
         salt = self.get_option('salt')
 
+        workers = self.get_option('workers')
+        if workers is None:
+            workers = multiprocessing_context.cpu_count()
+
+        cache = None
+        if self.get_option('cache') and salt is not None:
+            cache = HashCache(
+                key=self.get_option('cache_key'),
+                path=self.get_option('cache_dir'),
+                ttl=self.get_option('cache_ttl'),
+                size=self.get_option('cache_size')
+            )
+
         ret = []
+        jobs = []
         for term in terms:
             display.vvv("Current password to hash is %s" % term)
 
             if encrypt == 'md5':
-                password_hash = md5_digest(term)
-            else:
-                if salt is None:
-                    password_hash = salt_digest(term, salt_size=SALT_SIZE, iter=HASH_ITER)
-                else:
-                    password_hash = salt_digest(term, salt_size=SALT_SIZE, iter=HASH_ITER, salt_string=salt)
-
-            ret.append(to_text(password_hash))
+                ret.append(to_text(md5_digest(term)))
+                continue
+
+            name = None
+            if cache is not None:
+                name = cache.make_key(term, salt, 'sha256', HASH_ITER)
+                password_hash = cache.get(name)
+                if password_hash is not None:
+                    ret.append(to_text(password_hash))
+                    continue
+
+            ret.append(None)
+            jobs.append((len(ret) - 1, name, (term, generate_salt(SALT_SIZE, salt_string=salt), HASH_ITER)))
+
+        hashes = parallel_hash_salt([job for index, name, job in jobs], workers)
+        for (index, name, job), password_hash in zip(jobs, hashes):
+            if cache is not None:
+                cache.set(name, password_hash)
+            ret[index] = to_text(password_hash)
         return ret
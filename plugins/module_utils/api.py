@@ -5,15 +5,439 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 from .module import ONMSModule
-from ansible.module_utils.urls import Request, SSLValidationError, ConnectionError
+from .retry import Throttle, backoff_delays, parse_retry_after
+from ansible.module_utils.urls import SSLValidationError, ConnectionError, basic_auth_header
 from ansible.module_utils.six.moves.urllib.error import HTTPError
-from ansible.module_utils.six import PY2
+from ansible.module_utils.six import string_types
+from ansible.module_utils.six.moves.urllib.parse import urlparse, urljoin, urlencode, quote, unquote
+from ansible.module_utils.six.moves.urllib.request import Request as CookieRequest, getproxies, proxy_bypass
+from ansible.module_utils.six.moves import http_client, http_cookiejar
+from ansible.module_utils._text import to_bytes, to_native
+from io import BytesIO
+import errno
+import hashlib
 import json
+import os
+import socket
+import ssl
+import threading
+import time
+import zlib
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_CONNECTIONS = 4
+# Jetty closes idle connections after 30 seconds
+IDLE_TIMEOUT = 25
+MAX_REDIRECTS = 10
+DEFAULT_PAGE_SIZE = 100
+# Keys of a list response that are not the items
+COLLECTION_METADATA = ('count', 'totalCount', 'offset')
+# OpenNMS expires web sessions after 30 minutes
+DEFAULT_SESSION_TIMEOUT = 1800
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+# Bytes read from a compressed response at a time
+READ_CHUNK_SIZE = 65536
+ACCEPT_ENCODING = 'gzip, deflate'
+# Response of a server that does not accept the encoding of a request body
+UNSUPPORTED_MEDIA_TYPE = 415
+# Words of a 400 response body when the server could not decode a request body
+DECODING_ERROR_MARKERS = (b'gzip', b'deflate', b'decod', b'inflat', b'compress', b'content-encoding')
+# Methods sent again after a failure, the others only when they were not sent
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+# Responses of a server that is down, starting or behind a failing proxy
+UNAVAILABLE_STATUS_CODES = (502, 503, 504)
+RETRY_STATUS_CODES = (429,) + UNAVAILABLE_STATUS_CODES
+RETRY_BACKOFF = 2.0
+# FIQL comparison of each filter operator
+FIQL_OPERATORS = {
+    'eq': '==',
+    'ne': '!=',
+    'lt': '=lt=',
+    'le': '=le=',
+    'gt': '=gt=',
+    'ge': '=ge='
+}
+# OpenNMS matches a null value with the null character
+FIQL_NULL = '\x00'
+
+# v2 endpoints found on each host by query
+_API_V2_HOSTS = {}
+_API_V2_HOSTS_LOCK = threading.Lock()
+# Hosts that rejected a compressed request body
+_UNCOMPRESSED_HOSTS = set()
+_UNCOMPRESSED_HOSTS_LOCK = threading.Lock()
+
+
+# Clock for the request timings
+timer = getattr(time, 'monotonic', time.time)
+
+
+def _fiql_value(value):
+    if value is None:
+        return FIQL_NULL
+    if isinstance(value, bool):
+        return str(value).lower()
+    # Reserved FIQL characters must be escaped in a value
+    return quote(to_native(value), safe=' *:@!$\'+=/?.-_~')
+
+
+def build_fiql(filters):
+    """Returns the FIQL search expression of the filters.
+
+    Every key of the filters is a property of the v2 API and all of them
+    must match. The value is either compared for equality, a list of values
+    where any can match, or a dict of operators (eq, ne, lt, le, gt, ge) and
+    values that must all match. A value of None matches a null property and
+    an equality value can use * as a wildcard.
+
+    Parameters
+    ----------
+    filters : dict
+        Properties and the values to match
+
+    Returns
+    -------
+    expression : str
+        The value of the _s query parameter
+
+    Examples
+    --------
+    build_fiql({'category.name': 'Servers', 'node.label': 'web*'})
+        'category.name==Servers;node.label==web*'
+    build_fiql({'alarm.severity': {'ge': 'MAJOR'}, 'node.foreignSource': ['a', 'b']})
+        'alarm.severity=ge=MAJOR;(node.foreignSource==a,node.foreignSource==b)'
+    """
+    expressions = []
+    for name in sorted(filters):
+        value = filters[name]
+        if isinstance(value, dict):
+            for operator in sorted(value):
+                if operator not in FIQL_OPERATORS:
+                    raise ValueError("Unknown filter operator {0} for {1}, expected one of {2}".format(
+                        operator, name, ', '.join(sorted(FIQL_OPERATORS))
+                    ))
+                expressions.append(name + FIQL_OPERATORS[operator] + _fiql_value(value[operator]))
+        elif isinstance(value, (list, tuple)) and not isinstance(value, string_types):
+            if not value:
+                raise ValueError("The filter {0} needs at least one value".format(name))
+            any_of = ','.join(name + '==' + _fiql_value(item) for item in value)
+            expressions.append('(' + any_of + ')' if len(value) > 1 else any_of)
+        else:
+            expressions.append(name + '==' + _fiql_value(value))
+    return ';'.join(expressions)
+
+
+def _not_sent(error):
+    """Returns if the connection error happened before the request was sent."""
+    return isinstance(error, socket.error) and getattr(error, 'errno', None) in (errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH)
+
+
+def gzip_body(data):
+    """Returns the data compressed in the gzip format."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def read_body(response, encoding=None, chunk_size=READ_CHUNK_SIZE):
+    """Reads a response body, decompressing it one chunk at a time.
+
+    Parameters
+    ----------
+    response : http_client.HTTPResponse
+        Response to read
+    encoding : str, optional
+        Content-Encoding of the response, gzip and deflate are decompressed
+    chunk_size : int, optional
+        Bytes read at a time
+
+    Returns
+    -------
+    body : bytes
+        The decompressed body
+    length : int
+        Number of bytes received
+    """
+    encoding = (encoding or '').strip().lower()
+    if encoding not in ('gzip', 'x-gzip', 'deflate'):
+        body = response.read()
+        return body, len(body)
+
+    # gzip and zlib headers are detected, deflate without header is raw
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    raw = encoding == 'deflate'
+    chunks = []
+    length = 0
+    while True:
+        chunk = response.read(chunk_size)
+        if not chunk:
+            break
+        if length == 0 and raw:
+            try:
+                chunks.append(decompressor.decompress(chunk))
+            except zlib.error:
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                chunks.append(decompressor.decompress(chunk))
+        else:
+            chunks.append(decompressor.decompress(chunk))
+        length += len(chunk)
+    chunks.append(decompressor.flush())
+    return b''.join(chunks), length
+
+
+class ONMSResponse:
+    """Response of a pooled request with the body already read.
+
+    The timing holds the seconds spent opening the connection, waiting for
+    the first byte of the response and reading the body. The body is
+    decompressed, length is the number of bytes received.
+    """
+
+    def __init__(self, url, response, body, timing=None, reused=False, length=None):
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.msg
+        self.timing = timing or {}
+        self.reused = reused
+        self.length = len(body or b'') if length is None else length
+        self._body = body
+
+    def getcode(self):
+        return self.status
+
+    def info(self):
+        return self.headers
+
+    def read(self):
+        return self._body
+
+
+class ONMSHTTPConnection(http_client.HTTPConnection):
+    """HTTPConnection opening its socket with a custom create_connection."""
+
+    def __init__(self, host, port=None, *args, **kwargs):
+        create_connection = kwargs.pop('create_connection', None)
+        http_client.HTTPConnection.__init__(self, host, port, *args, **kwargs)
+        self.create_connection = create_connection or socket.create_connection
+
+    def connect(self):
+        self.sock = self.create_connection((self.host, self.port), self.timeout, self.source_address)
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (socket.error, AttributeError):
+            pass
+        # set_tunnel was called, ask the proxy to connect to the server
+        if getattr(self, '_tunnel_host', None):
+            self._tunnel()
+
+
+class ONMSHTTPSConnection(http_client.HTTPSConnection, ONMSHTTPConnection):
+    """HTTPSConnection opening its socket with a custom create_connection.
+
+    HTTPSConnection.connect wraps the socket opened by the connect of the
+    next class, ONMSHTTPConnection.
+    """
+
+    def __init__(self, host, port=None, *args, **kwargs):
+        create_connection = kwargs.pop('create_connection', None)
+        http_client.HTTPSConnection.__init__(self, host, port, *args, **kwargs)
+        self.create_connection = create_connection or socket.create_connection
+
+
+class ONMSConnectionPool:
+    """Keep-alive HTTP connections shared by every request of a module.
+
+    Connections are kept for each scheme, host and port. An idle connection
+    is reused until it is older than IDLE_TIMEOUT. A reused connection that
+    was closed by the server is reopened and the request is sent again.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, validate_certs=True, timeout=DEFAULT_TIMEOUT, create_connection=None,
+                 compression=True):
+        """Initialize class.
+
+        Parameters
+        ----------
+        max_connections : int, optional
+            Maximum open connections for each host and port
+        validate_certs : bool, optional
+            Verify the SSL certificate of https connections (Default is True)
+        timeout : int, optional
+            Socket timeout in seconds
+        create_connection : callable, optional
+            Opens the socket of a connection (Default is socket.create_connection)
+        compression : bool, optional
+            Ask for compressed responses (Default is True)
+        """
+        self.max_connections = max_connections
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self.create_connection = create_connection
+        self.compression = compression
+        self._idle = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    def _get_ssl_context(self):
+        if self._ssl_context is None:
+            context = ssl.create_default_context()
+            if not self.validate_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._ssl_context = context
+        return self._ssl_context
+
+    def _get_proxy(self, key):
+        """Returns the parsed URL of the proxy from the environment for the host or None."""
+        scheme, host, port = key
+        proxy = getproxies().get(scheme)
+        if not proxy or proxy_bypass("{0}:{1}".format(host, port)):
+            return None
+        if '://' not in proxy:
+            proxy = 'http://' + proxy
+        return urlparse(proxy)
+
+    def _proxy_headers(self, proxy):
+        if proxy is None or proxy.username is None:
+            return {}
+        return {'Proxy-Authorization': basic_auth_header(unquote(proxy.username), unquote(proxy.password or ''))}
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        proxy = self._get_proxy(key)
+        connect_host, connect_port = host, port
+        if proxy is not None:
+            connect_host, connect_port = proxy.hostname, proxy.port or 80
+        if scheme == 'https':
+            conn = ONMSHTTPSConnection(
+                connect_host, connect_port, create_connection=self.create_connection, timeout=self.timeout, context=self._get_ssl_context()
+            )
+            if proxy is not None:
+                # Tunnel the TLS connection through the proxy
+                conn.set_tunnel(host, port, headers=self._proxy_headers(proxy))
+        else:
+            conn = ONMSHTTPConnection(connect_host, connect_port, create_connection=self.create_connection, timeout=self.timeout)
+        return conn
+
+    def _acquire(self, key):
+        """Returns an idle connection or a new one and if it was reused."""
+        with self._lock:
+            slots = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_connections))
+        slots.acquire()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if time.time() - last_used < IDLE_TIMEOUT:
+                    # The timeout may have changed since the socket was opened
+                    conn.timeout = self.timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(self.timeout)
+                    return conn, True
+                conn.close()
+        return self._new_connection(key), False
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            with self._lock:
+                self._idle[key].append((conn, time.time()))
+        else:
+            conn.close()
+        self._slots[key].release()
+
+    def _send(self, conn, method, path, body, headers, timing):
+        if conn.sock is None:
+            start = timer()
+            conn.connect()
+            timing['connect'] = timer() - start
+        start = timer()
+        conn.request(method, path, body=body, headers=headers)
+        # The server may have processed the request from here on
+        timing['sent'] = True
+        response = conn.getresponse()
+        timing['first_byte'] = timer() - start
+        return response
+
+    def urlopen(self, method, url, body=None, headers=None):
+        """Send a request over a pooled connection.
+
+        Parameters
+        ----------
+        method : str
+            Type of request to perform
+        url : str
+            Full URL of the request
+        body : bytes, optional
+            Information to send with the request
+        headers : dict, optional
+            Headers to send with the request
+
+        Returns
+        -------
+        response : ONMSResponse
+            Response of the request
+        """
+        parsed = urlparse(url)
+        port = parsed.port
+        if port is None:
+            port = 443 if parsed.scheme == 'https' else 80
+        key = (parsed.scheme, parsed.hostname, port)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = "{0}?{1}".format(path, parsed.query)
+
+        headers = dict(headers or {})
+        if self.compression:
+            headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+        proxy = self._get_proxy(key)
+        if proxy is not None and parsed.scheme == 'http':
+            # A plain HTTP proxy is sent the full URL
+            path = "http://{0}:{1}{2}".format(parsed.hostname, port, path)
+            headers.update(self._proxy_headers(proxy))
+
+        conn, reused = self._acquire(key)
+        timing = {'connect': 0.0, 'first_byte': 0.0, 'read': 0.0}
+        try:
+            try:
+                response = self._send(conn, method, path, body, headers, timing)
+            except socket.timeout:
+                raise
+            except (http_client.BadStatusLine, http_client.CannotSendRequest, socket.error):
+                # The server closed the idle connection, reconnect once. A
+                # request that may have been processed is only sent again
+                # when sending it twice does no harm.
+                if not reused or (timing.pop('sent', False) and method not in IDEMPOTENT_METHODS):
+                    raise
+                conn.close()
+                conn = self._new_connection(key)
+                reused = False
+                response = self._send(conn, method, path, body, headers, timing)
+            timing.pop('sent', None)
+            start = timer()
+            response_body, length = read_body(response, response.getheader('Content-Encoding'))
+            timing['read'] = timer() - start
+        except Exception:
+            conn.close()
+            self._slots[key].release()
+            raise
+
+        self._release(key, conn, not response.will_close)
+        return ONMSResponse(url, response, response_body, timing=timing, reused=reused, length=length)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, last_used in idle:
+                    conn.close()
+            self._idle = {}
 
 
 class ONMSAPIModule(ONMSModule):
 
-    request = None
+    pool = None
+    cookies = None
 
     def __init__(self, argument_spec, **kwargs):
         """Initialize class.
@@ -24,7 +448,216 @@ class ONMSAPIModule(ONMSModule):
             List of arguments provided to the module
         """
         super(ONMSAPIModule, self).__init__(argument_spec=argument_spec, **kwargs)
-        self.request = Request()
+
+    def setup(self):
+        """Create the connection pool and load the session."""
+        super(ONMSAPIModule, self).setup()
+        self.metrics = None
+        if self.params.get('onms_metrics') or self.params.get('onms_metrics_file'):
+            self.metrics = []
+        self._session_lock = threading.Lock()
+        if (self.params.get('onms_max_connections') or 0) < 1:
+            self.fail_json(msg="onms_max_connections must be at least 1, got {0}".format(self.params.get('onms_max_connections')))
+        self.pool = ONMSConnectionPool(
+            max_connections=self.params.get('onms_max_connections'),
+            validate_certs=self.params.get('validate_certs'),
+            create_connection=self.create_connection,
+            compression=self.params.get('onms_compression', True)
+        )
+        self.compress_requests = self.params.get('onms_compress_requests') or 0
+        self.retries = self.params.get('onms_retries') or 0
+        self.retry_count = 0
+        self.throttle = Throttle(
+            self.url.netloc,
+            path=self.params.get('onms_throttle_file'),
+            max_rps=self.params.get('onms_max_rps'),
+            failure_threshold=self.params.get('onms_circuit_breaker'),
+            reset_timeout=self.params.get('onms_circuit_breaker_timeout') or 0,
+            warn=self.warn
+        )
+        self.session_timeout = self.params.get('onms_session_timeout')
+        self.session_file = None
+        if self.params.get('onms_session_cache'):
+            self.session_file = self._get_session_file(self.params['onms_session_cache'])
+        self.cookies = self._load_session()
+
+    def _get_session_file(self, path):
+        """Returns the session cache file for the host and user."""
+        path = os.path.expanduser(path)
+        try:
+            if not os.path.isdir(path):
+                os.makedirs(path, 0o700)
+        except Exception as e:
+            self.fail_json(msg="Unable to create the session cache directory ({1}): {0}".format(path, e))
+        key = "{0}|{1}".format(self.url.netloc, self.username)
+        return os.path.join(path, "{0}.cookies".format(hashlib.sha256(to_bytes(key)).hexdigest()))
+
+    def _load_session(self):
+        """Returns the cookie jar with any unexpired cached session."""
+        if self.session_file is None:
+            return http_cookiejar.CookieJar()
+        cookies = http_cookiejar.LWPCookieJar(self.session_file)
+        if os.path.exists(self.session_file):
+            try:
+                cookies.load()
+            except Exception as e:
+                self.warn("Ignoring the unreadable session cache {0}: {1}".format(self.session_file, e))
+                cookies.clear()
+        return cookies
+
+    def _save_session(self):
+        """Write the cookie jar to the session cache."""
+        if self.session_file is None:
+            return
+        try:
+            with self._session_lock:
+                # Create the file before saving so the session is never readable by others
+                os.close(os.open(self.session_file, os.O_WRONLY | os.O_CREAT, 0o600))
+                self.cookies.save()
+        except Exception as e:
+            self.warn("Unable to save the session cache {0}: {1}".format(self.session_file, e))
+
+    def _add_auth(self, url, headers, force_basic_auth=False):
+        """Returns the headers with the session cookie or basic authentication."""
+        headers = dict(headers or {})
+        if not force_basic_auth:
+            cookie_request = CookieRequest(url)
+            self.cookies.add_cookie_header(cookie_request)
+            cookie = cookie_request.get_header('Cookie')
+            if cookie:
+                headers['Cookie'] = cookie
+                return headers
+        headers['Authorization'] = basic_auth_header(self.username, self.password)
+        return headers
+
+    def _extract_session(self, url, response):
+        """Store the session cookie of the response in the cookie jar."""
+        if not response.headers.get('Set-Cookie'):
+            return
+        self.cookies.extract_cookies(response, CookieRequest(url))
+        expires = int(time.time()) + self.session_timeout
+        for cookie in self.cookies:
+            # Session cookies have no expiry, limit them to the session timeout
+            if cookie.expires is None or cookie.discard:
+                cookie.expires = expires
+                cookie.discard = False
+        self._save_session()
+
+    def open_url(self, method, url, headers=None, data=None):
+        """Send a request through the connection pool.
+
+        The session cookie is sent once the server has returned one, otherwise
+        basic authentication is used. A request rejected while using the session
+        is sent again with basic authentication. Redirects are followed and
+        error responses are raised as HTTPError.
+
+        Idempotent requests failing with a connection error or a response of
+        an overloaded server are sent again up to onms_retries times, after
+        an exponential delay or the delay of the Retry-After header. Every
+        request waits for the rate limit and fails without being sent while
+        the circuit breaker is open.
+
+        Parameters
+        ----------
+        method : str
+            Type of request to perform
+        url : str
+            Full URL of the request
+        headers : dict, optional
+            Headers to send with the request
+        data : str, optional
+            Information to send with the request
+
+        Returns
+        -------
+        response : ONMSResponse
+            Response of the request
+        """
+        if data is not None:
+            data = to_bytes(data)
+        compressed = self._compress_request(url, data)
+        force_basic_auth = False
+        redirects = 0
+        retries = 0
+        delays = backoff_delays(self.params.get('onms_retry_delay') or 0, self.params.get('onms_retry_max_delay') or 0, RETRY_BACKOFF)
+        while redirects <= MAX_REDIRECTS:
+            request_headers = self._add_auth(url, headers, force_basic_auth=force_basic_auth)
+            body = data
+            if compressed is not None:
+                request_headers['Content-Encoding'] = 'gzip'
+                body = compressed
+            self.throttle.acquire()
+            try:
+                response = self.pool.urlopen(method, url, body=body, headers=request_headers)
+            except (ssl.SSLError, ssl.CertificateError) as e:
+                raise SSLValidationError(to_native(e))
+            except (socket.error, http_client.HTTPException) as e:
+                self.throttle.record(False)
+                if retries < self.retries and (method in IDEMPOTENT_METHODS or _not_sent(e)):
+                    retries += 1
+                    self._wait_retry(method, url, next(delays), to_native(e))
+                    continue
+                raise ConnectionError(to_native(e))
+            self._record_metric(method, url, data, response, body)
+            self.throttle.record(response.status not in UNAVAILABLE_STATUS_CODES)
+
+            if response.status in RETRY_STATUS_CODES and retries < self.retries and method in IDEMPOTENT_METHODS:
+                delay = parse_retry_after(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = next(delays)
+                # Give up when the server asks to wait longer than the largest delay
+                if delay <= (self.params.get('onms_retry_max_delay') or 0):
+                    retries += 1
+                    self._wait_retry(method, url, delay, "HTTP {0}".format(response.status))
+                    continue
+
+            if compressed is not None and response.status in (400, UNSUPPORTED_MEDIA_TYPE):
+                content = response.read()
+                if response.status == 400 and not any(marker in content.lower() for marker in DECODING_ERROR_MARKERS):
+                    # Rejected for another reason, sending it again would fail the same way
+                    raise HTTPError(url, response.status, response.reason, response.headers, BytesIO(content))
+                # The server does not decompress requests, send the body as is
+                with _UNCOMPRESSED_HOSTS_LOCK:
+                    _UNCOMPRESSED_HOSTS.add(urlparse(url).netloc)
+                compressed = None
+                continue
+
+            if response.status == 401 and 'Cookie' in request_headers:
+                # The session has expired, log in again
+                self.cookies.clear()
+                self._save_session()
+                force_basic_auth = True
+                continue
+            self._extract_session(url, response)
+
+            location = response.headers.get('Location')
+            if response.status in REDIRECT_CODES and location:
+                url = urljoin(url, location)
+                if response.status == 303:
+                    method = 'GET'
+                    data = None
+                    compressed = None
+                redirects += 1
+                continue
+            if response.status >= 400:
+                raise HTTPError(url, response.status, response.reason, response.headers, BytesIO(response.read()))
+            return response
+
+        raise ConnectionError("Too many redirects when calling {0}".format(url))
+
+    def _wait_retry(self, method, url, delay, reason):
+        self.retry_count += 1
+        self.debug(msg="{0} {1} failed ({2}), sending it again in {3:.2f} seconds".format(method, urlparse(url).path, reason, delay))
+        time.sleep(delay)
+
+    def _compress_request(self, url, data):
+        """Returns the gzip compressed data when it should be sent compressed, otherwise None."""
+        if not self.compress_requests or data is None or len(data) < self.compress_requests:
+            return None
+        with _UNCOMPRESSED_HOSTS_LOCK:
+            if urlparse(url).netloc in _UNCOMPRESSED_HOSTS:
+                return None
+        return gzip_body(data)
 
     def make_request(self, method, endpoint, *args, **kwargs):
         """Make API request.
@@ -39,10 +672,14 @@ class ONMSAPIModule(ONMSModule):
             Information to send with the request (Default is None)
         version : int, optional
             Version of API (Default is 1).
+        query_params : dict, optional
+            Query string parameters to add to the URL
         ignore_404 : bool, optional
             Determines if the module will handle 404 errors
         xml_data : bool, optional
             States the data is XML instead of JSON
+        form_data : bool, optional
+            States the data is a dict sent as a form instead of JSON
 
         Returns
         -------
@@ -62,36 +699,29 @@ class ONMSAPIModule(ONMSModule):
             headers['Content-Type'] = 'application/xml'
         elif method == 'PUT' and kwargs.get('xml_data') is True:
             headers['Content-Type'] = 'application/xml'
+        elif kwargs.get('form_data') is True:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
         else:
             headers['Content-Type'] = 'application/json'
-        validate_certs = self.params.get('validate_certs')
         username = self.username
-        password = self.password
-        force_basic_auth = True
         data = kwargs.get('data', None)
+        if kwargs.get('form_data') is True and isinstance(data, dict):
+            data = urlencode(sorted(data.items()))
         version = kwargs.get('version', 1)
-        url = self.build_url(endpoint, version=version)
+        query_params = kwargs.get('query_params', None)
+        url = self.build_url(endpoint, query_params=query_params, version=version)
         status_code = None
 
         try:
-            response = self.request.open(
-                method,
-                url.geturl(),
-                headers=headers,
-                url_username=username,
-                url_password=password,
-                force_basic_auth=force_basic_auth,
-                validate_certs=validate_certs,
-                data=data,
-                follow_redirects=True
-            )
+            response = self.open_url(method, url.geturl(), headers=headers, data=data)
         except(SSLValidationError) as ssl_error:
             self.fail_json(msg="Could not establish a secure connection to {0}: {1}".format(self.url.geturl(), ssl_error))
         except(ConnectionError) as ce:
             self.fail_json(msg="Failed to connect to {0}: {1}".format(self.url.geturl(), ce))
         except(HTTPError) as he:
             if he.code >= 500:
-                self.fail_json(msg="The host responded with a server error ({1}): {0}".format(url.netloc, he.code))
+                retried = " after {0} retries".format(self.retry_count) if self.retry_count else ""
+                self.fail_json(msg="The host responded with a server error ({1}){2}: {0}".format(url.netloc, he.code, retried))
             if he.code == 401:
                 self.fail_json(msg="An authentication error has occured with user: {0}".format(username))
             if he.code == 403:
@@ -105,6 +735,8 @@ class ONMSAPIModule(ONMSModule):
                 self.fail_json(msg="The host responded that method {0} is not allowed to this endpoint {1}".format(method, url.path))
             if he.code == 400:
                 self.fail_json(msg="The host received a malformed request to {0}".format(url.path))
+            if he.code == 429:
+                self.fail_json(msg="The host rejected too many requests ({1}), lower onms_max_rps: {0}".format(url.netloc, he.code))
         except(Exception) as e:
             self.fail_json(msg="There was an unknown error when calling {0}: {1}.".format(self.url.geturl(), e))
 
@@ -122,12 +754,308 @@ class ONMSAPIModule(ONMSModule):
             except(Exception) as e:
                 self.fail_json(msg="Failed to parse the response json: {0}".format(e))
 
-        if PY2:
-            status_code = response.getcode()
-        else:
-            status_code = response.status
+        status_code = response.status
         return {'status_code': status_code, 'json': response_json}
 
+    def _record_metric(self, method, url, data, response, body=None):
+        """Keep the timing and size of a request when metrics are enabled.
+
+        bytes_in and bytes_out are the sizes of the bodies, wire_in and
+        wire_out the bytes sent after compression.
+        """
+        if self.metrics is None:
+            return
+        parsed = urlparse(url)
+        timing = response.timing
+        self.metrics.append({
+            'time': time.time(),
+            'method': method,
+            'endpoint': parsed.path,
+            'status': response.status,
+            'bytes_out': len(data or b''),
+            'bytes_in': len(response.read() or b''),
+            'wire_out': len(data or b'') if body is None else len(body),
+            'wire_in': response.length,
+            'reused': response.reused,
+            'connect': round(timing.get('connect', 0.0), 6),
+            'first_byte': round(timing.get('first_byte', 0.0), 6),
+            'read': round(timing.get('read', 0.0), 6)
+        })
+
+    def get_metrics(self):
+        """Returns the aggregated request metrics and writes them to the metrics file.
+
+        Returns
+        -------
+        api_metrics : dict
+            Totals of the requests made by the module or None when disabled
+        """
+        if self.metrics is None:
+            return None
+
+        summary = {
+            'requests': len(self.metrics),
+            'new_connections': 0,
+            'bytes_in': 0,
+            'bytes_out': 0,
+            'wire_in': 0,
+            'wire_out': 0,
+            'retries': self.retry_count,
+            'time': {'connect': 0.0, 'first_byte': 0.0, 'read': 0.0, 'total': 0.0},
+            'methods': {},
+            'status': {}
+        }
+        for metric in self.metrics:
+            if not metric['reused']:
+                summary['new_connections'] += 1
+            summary['bytes_in'] += metric['bytes_in']
+            summary['bytes_out'] += metric['bytes_out']
+            summary['wire_in'] += metric['wire_in']
+            summary['wire_out'] += metric['wire_out']
+            for name in ('connect', 'first_byte', 'read'):
+                summary['time'][name] += metric[name]
+                summary['time']['total'] += metric[name]
+            summary['methods'][metric['method']] = summary['methods'].get(metric['method'], 0) + 1
+            status = str(metric['status'])
+            summary['status'][status] = summary['status'].get(status, 0) + 1
+        for name, value in summary['time'].items():
+            summary['time'][name] = round(value, 6)
+        # Bytes of the bodies for every byte sent, above 1 when compressed
+        summary['compression_ratio'] = {
+            'in': round(float(summary['bytes_in']) / summary['wire_in'], 3) if summary['wire_in'] else 1.0,
+            'out': round(float(summary['bytes_out']) / summary['wire_out'], 3) if summary['wire_out'] else 1.0
+        }
+
+        metrics_file = self.params.get('onms_metrics_file')
+        if metrics_file and self.metrics:
+            lines = ''.join(json.dumps(metric, sort_keys=True) + '\n' for metric in self.metrics)
+            try:
+                with open(os.path.expanduser(metrics_file), 'a') as f:
+                    f.write(lines)
+            except Exception as e:
+                self.warn("Unable to write the metrics file {0}: {1}".format(metrics_file, e))
+            self.metrics = []
+
+        return summary
+
+    def _add_metrics(self, result):
+        if getattr(self, 'metrics', None) is not None:
+            result['api_metrics'] = self.get_metrics()
+
+    def exit_json(self, **kwargs):
+        self._add_metrics(kwargs)
+        super(ONMSAPIModule, self).exit_json(**kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        self._add_metrics(kwargs)
+        super(ONMSAPIModule, self).fail_json(msg=msg, **kwargs)
+
+    def run_concurrently(self, tasks, max_concurrency=1):
+        """Run API calls and return their results in order.
+
+        A module reports failures by exiting the process, so the calls are
+        always run one after another. ONMSControllerModule overrides this to
+        use a thread pool.
+
+        Parameters
+        ----------
+        tasks : list
+            Callables that each make API requests
+        max_concurrency : int, optional
+            Maximum calls to run at the same time
+
+        Returns
+        -------
+        results : list
+            Return value of each callable
+        """
+        return [task() for task in tasks]
+
+    def iter_collection(self, endpoint, key=None, page_size=DEFAULT_PAGE_SIZE, query_params=None, version=1, first_page=None):
+        """Iterate over every item of a list endpoint one page at a time.
+
+        Pages are requested with limit and offset until totalCount items have
+        been returned or a page is short, so only one page is held in memory.
+        Add orderBy to the query parameters for a stable order between pages.
+        Paging stops when a page starts with the first item of the previous
+        page, the endpoint ignores the offset.
+
+        Parameters
+        ----------
+        endpoint : str
+            List endpoint such as /nodes or /alarms
+        key : str, optional
+            Key of the items in the response (Default is the first list)
+        page_size : int, optional
+            Number of items requested per page
+        query_params : dict, optional
+            Query string parameters to add to every page
+        version : int, optional
+            Version of API (Default is 1).
+        first_page : dict, optional
+            Response already received for the first page
+
+        Yields
+        ------
+        item : dict
+            Each item of the collection
+        """
+        offset = 0
+        response = first_page
+        previous_first = None
+        while True:
+            if response is None:
+                params = dict(query_params or {})
+                params.update(limit=page_size, offset=offset)
+                response = self.get(endpoint, version=version, query_params=params, ignore_404=True)
+                if response is None:
+                    return
+
+            page = response['json']
+            response = None
+            items = self._get_collection_items(page, key)
+            if items and offset > 0 and items[0] == previous_first:
+                self.warn("{0} ignores the offset parameter, stopped after the first {1} items".format(endpoint, offset))
+                return
+            previous_first = items[0] if items else None
+            for item in items:
+                yield item
+
+            offset += len(items)
+            total = page.get('totalCount')
+            if not items or len(items) < page_size or (total is not None and offset >= int(total)):
+                return
+            if len(items) > page_size:
+                # The endpoint does not support paging and returned everything
+                return
+
+    def build_query(self, filters=None, limit=None, offset=None, order_by=None, order=None):
+        """Returns the query parameters of a filtered v2 request.
+
+        Parameters
+        ----------
+        filters : dict, optional
+            Properties and values to match, see build_fiql
+        limit : int, optional
+            Maximum number of items returned
+        offset : int, optional
+            Number of items skipped
+        order_by : str, optional
+            Property used to sort the items
+        order : str, optional
+            Sort order, asc or desc
+
+        Returns
+        -------
+        query_params : dict
+            Parameters for make_request or iter_collection
+        """
+        query_params = {}
+        if filters:
+            try:
+                query_params['_s'] = build_fiql(filters)
+            except ValueError as e:
+                self.fail_json(msg="Invalid filters: {0}".format(e))
+        if limit is not None:
+            query_params['limit'] = limit
+        if offset is not None:
+            query_params['offset'] = offset
+        if order_by is not None:
+            query_params['orderBy'] = order_by
+        if order is not None:
+            query_params['order'] = order
+        return query_params
+
+    def supports_api_v2(self, endpoint):
+        """Returns if the server has the v2 endpoint, or None when unknown.
+
+        The answer is kept for each host and endpoint by every module run of
+        the process and, when it is set, in the onms_api_cache file for
+        onms_api_cache_ttl seconds.
+        """
+        key = (self.url.netloc, endpoint)
+        with _API_V2_HOSTS_LOCK:
+            if key in _API_V2_HOSTS:
+                return _API_V2_HOSTS[key]
+
+        cache_file = self.params.get('onms_api_cache')
+        ttl = self.params.get('onms_api_cache_ttl') or 0
+        if not cache_file or ttl <= 0:
+            return None
+        cached = self._read_cache(os.path.expanduser(cache_file)).get("{0}|{1}".format(*key))
+        if cached is None or time.time() - cached.get('time', 0) >= ttl:
+            return None
+        with _API_V2_HOSTS_LOCK:
+            _API_V2_HOSTS[key] = cached['supported']
+        return cached['supported']
+
+    def _set_api_v2(self, endpoint, supported):
+        """Keeps if the server has the v2 endpoint."""
+        key = (self.url.netloc, endpoint)
+        with _API_V2_HOSTS_LOCK:
+            _API_V2_HOSTS[key] = supported
+        cache_file = self.params.get('onms_api_cache')
+        ttl = self.params.get('onms_api_cache_ttl') or 0
+        if cache_file and ttl > 0:
+            self._write_cache(os.path.expanduser(cache_file), "{0}|{1}".format(*key), {'time': time.time(), 'supported': supported}, ttl)
+
+    def query(self, endpoint, filters=None, key=None, order_by='id', order=None, page_size=DEFAULT_PAGE_SIZE):
+        """Iterate over the items of a v2 endpoint that match the filters.
+
+        The server filters and pages the items so only the matching items are
+        returned. The first page of the first query to a host also detects if
+        the server has the v2 endpoint, the module fails when it does not.
+
+        Parameters
+        ----------
+        endpoint : str
+            v2 list endpoint such as /nodes or /alarms
+        filters : dict, optional
+            Properties and values to match, see build_fiql
+        key : str, optional
+            Key of the items in the response (Default is the first list)
+        order_by : str, optional
+            Property used to sort the items (Default is id)
+        order : str, optional
+            Sort order, asc or desc
+        page_size : int, optional
+            Number of items requested per page
+
+        Yields
+        ------
+        item : dict
+            Each matching item
+        """
+        query_params = self.build_query(filters, order_by=order_by, order=order)
+        supported = self.supports_api_v2(endpoint)
+        first_page = None
+        if supported is None:
+            params = dict(query_params, limit=page_size, offset=0)
+            first_page = self.get(endpoint, version=2, query_params=params, ignore_404=True)
+            supported = first_page is not None
+            self._set_api_v2(endpoint, supported)
+
+        if not supported:
+            self.fail_json(msg="The OpenNMS server at {0} does not support filtering {1}, it requires the v2 API".format(self.url.geturl(), endpoint))
+
+        for item in self.iter_collection(endpoint, key=key, page_size=page_size, query_params=query_params, version=2, first_page=first_page):
+            yield item
+
+    def _get_collection_items(self, page, key=None):
+        """Returns the list of items in a list response."""
+        if not isinstance(page, dict):
+            return []
+        if key is None:
+            for name, value in page.items():
+                if name not in COLLECTION_METADATA and isinstance(value, (list, dict)):
+                    key = name
+                    break
+        items = page.get(key) or []
+        if isinstance(items, dict):
+            # A single item is not always wrapped in a list
+            items = [items]
+        return items
+
     def get(self, endpoint, *args, **kwargs):
         """Wrapper for GET request"""
         return self.make_request('GET', endpoint, **kwargs)
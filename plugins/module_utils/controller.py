@@ -0,0 +1,181 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from .api import ONMSAPIModule
+from .module import ONMSModule
+from ansible.module_utils.basic import AnsibleModule, remove_values
+from ansible.module_utils._text import to_native
+from multiprocessing.pool import ThreadPool
+import copy
+import traceback
+
+try:
+    from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+    HAS_ARG_SPEC_VALIDATOR = True
+except ImportError:
+    HAS_ARG_SPEC_VALIDATOR = False
+
+
+class ONMSControllerError(Exception):
+    """Raised by ONMSControllerModule.fail_json."""
+
+    def __init__(self, msg, **kwargs):
+        super(ONMSControllerError, self).__init__(msg)
+        self.msg = msg
+        self.kwargs = kwargs
+
+
+class LegacyArgumentValidator(AnsibleModule):
+    """Validates the task arguments with AnsibleModule before ansible-core 2.11.
+
+    The arguments are read from the task instead of the module input and
+    failures raise ONMSControllerError instead of exiting the process.
+    Nothing is logged and the working directory is left as is.
+    """
+
+    def __init__(self, argument_spec, task_args, **kwargs):
+        """Initialize class.
+
+        Parameters
+        ----------
+        argument_spec : dict
+            List of arguments accepted by the module
+        task_args : dict
+            Arguments provided to the task
+        """
+        self._task_args = copy.deepcopy(task_args)
+        super(LegacyArgumentValidator, self).__init__(argument_spec, supports_check_mode=True, **kwargs)
+
+    def _load_params(self):
+        self.params = self._task_args
+
+    def _log_invocation(self):
+        pass
+
+    def _set_cwd(self):
+        return None
+
+    def fail_json(self, msg=None, **kwargs):
+        raise ONMSControllerError(remove_values(msg, self.no_log_values), **remove_values(kwargs, self.no_log_values))
+
+
+class ONMSControllerModule(ONMSAPIModule):
+    """Runs the ONMSAPIModule logic inside an action plugin on the controller.
+
+    The parameters are validated against the module argument spec with
+    ArgumentSpecValidator, or LegacyArgumentValidator before ansible-core
+    2.11. Failures raise ONMSControllerError instead of exiting the
+    process so API calls can run in a thread pool. The values of no_log
+    parameters are masked in the failures, the same way AnsibleModule
+    masks them in its results.
+    """
+
+    def __init__(self, argument_spec, task_args, check_mode=False, diff=False, **kwargs):
+        """Initialize class.
+
+        Parameters
+        ----------
+        argument_spec : dict
+            List of arguments accepted by the module
+        task_args : dict
+            Arguments provided to the task
+        check_mode : bool, optional
+            Do not make any changes (Default is False)
+        diff : bool, optional
+            Return the differences of the changes (Default is False)
+        mutually_exclusive : list, optional
+            Arguments that can not be used together
+        required_one_of : list, optional
+            Arguments of which at least one must be used
+        """
+        self._debug = False
+        self._diff = diff
+        self.check_mode = check_mode
+        self.warnings = []
+        self.no_log_values = set()
+
+        full_argspec = {}
+        full_argspec.update(ONMSModule.AUTH_ARGSPEC)
+        full_argspec.update(argument_spec)
+
+        if HAS_ARG_SPEC_VALIDATOR:
+            validator = ArgumentSpecValidator(
+                full_argspec, mutually_exclusive=kwargs.get('mutually_exclusive'), required_one_of=kwargs.get('required_one_of')
+            )
+            validation = validator.validate(task_args)
+            self.no_log_values = validation._no_log_values
+            if validation.error_messages:
+                self.fail_json(msg="; ".join(validation.error_messages))
+            self.params = validation.validated_parameters
+        else:
+            validator = LegacyArgumentValidator(
+                full_argspec, task_args, mutually_exclusive=kwargs.get('mutually_exclusive'), required_one_of=kwargs.get('required_one_of')
+            )
+            self.no_log_values = validator.no_log_values
+            self.params = validator.params
+
+        self.setup()
+
+    def fail_json(self, msg, **kwargs):
+        raise ONMSControllerError(remove_values(msg, self.no_log_values), **remove_values(kwargs, self.no_log_values))
+
+    def warn(self, warning):
+        self.warnings.append(remove_values(warning, self.no_log_values))
+
+    def debug(self, msg):
+        pass
+
+    def run_concurrently(self, tasks, max_concurrency=1):
+        """Run API calls in a bounded thread pool and return their results in order."""
+        max_concurrency = min(max_concurrency, len(tasks))
+        if max_concurrency <= 1:
+            return super(ONMSControllerModule, self).run_concurrently(tasks)
+
+        pool = ThreadPool(processes=max_concurrency)
+        try:
+            return pool.map(lambda task: task(), tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+
+def run_on_controller(argument_spec, task_args, run, check_mode=False, diff=False, **kwargs):
+    """Returns the result of running the module logic on the controller.
+
+    Parameters
+    ----------
+    argument_spec : dict
+        List of arguments accepted by the module
+    task_args : dict
+        Arguments provided to the task
+    run : callable
+        Function receiving the module and returning the result
+    check_mode : bool, optional
+        Do not make any changes (Default is False)
+    diff : bool, optional
+        Return the differences of the changes (Default is False)
+    """
+    result = dict(changed=False, failed=False)
+    module = None
+    try:
+        module = ONMSControllerModule(argument_spec, task_args, check_mode=check_mode, diff=diff, **kwargs)
+        result.update(run(module))
+    except ONMSControllerError as e:
+        result.update(e.kwargs)
+        result.update(failed=True, msg=e.msg)
+    except Exception as e:
+        result.update(failed=True, msg="Unexpected error running the module on the controller: {0}".format(to_native(e)), exception=traceback.format_exc())
+    finally:
+        if module is not None:
+            module.pool.close()
+
+    if module is not None and module.metrics is not None:
+        result['api_metrics'] = module.get_metrics()
+    if module is not None and module.warnings:
+        result['warnings'] = module.warnings
+    if module is not None:
+        result = remove_values(result, module.no_log_values)
+    return result
@@ -4,10 +4,18 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
-from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.six.moves.urllib.parse import urlparse  # urlencode
-from socket import gethostbyname
+from ansible.module_utils.basic import AnsibleModule, env_fallback
+from ansible.module_utils.six.moves.urllib.parse import urlparse, urlencode
+import json
+import os
 import re
+import socket
+import threading
+import time
+
+# Addresses of the hosts resolved by this process
+_ADDRESS_CACHE = {}
+_ADDRESS_CACHE_LOCK = threading.Lock()
 
 
 class ONMSModule(AnsibleModule):
@@ -16,7 +24,26 @@ class ONMSModule(AnsibleModule):
         onms_host=dict(type='str', required=True),
         onms_username=dict(type='str', required=True),
         onms_password=dict(type='str', required=True, no_log=True),
-        validate_certs=dict(type='bool', default=True)
+        validate_certs=dict(type='bool', default=True),
+        onms_max_connections=dict(type='int', default=4),
+        onms_session_cache=dict(type='path'),
+        onms_session_timeout=dict(type='int', default=1800),
+        onms_run_on_controller=dict(type='bool', default=False),
+        onms_metrics=dict(type='bool', default=False, fallback=(env_fallback, ['OPENNMS_METRICS'])),
+        onms_metrics_file=dict(type='path', fallback=(env_fallback, ['OPENNMS_METRICS_FILE'])),
+        onms_dns_cache=dict(type='path'),
+        onms_dns_cache_ttl=dict(type='int', default=300),
+        onms_api_cache=dict(type='path'),
+        onms_api_cache_ttl=dict(type='int', default=86400),
+        onms_compression=dict(type='bool', default=True, fallback=(env_fallback, ['OPENNMS_COMPRESSION'])),
+        onms_compress_requests=dict(type='int', default=0, fallback=(env_fallback, ['OPENNMS_COMPRESS_REQUESTS'])),
+        onms_retries=dict(type='int', default=3, fallback=(env_fallback, ['OPENNMS_RETRIES'])),
+        onms_retry_delay=dict(type='float', default=1.0),
+        onms_retry_max_delay=dict(type='float', default=30.0),
+        onms_max_rps=dict(type='float', default=0, fallback=(env_fallback, ['OPENNMS_MAX_RPS'])),
+        onms_circuit_breaker=dict(type='int', default=0),
+        onms_circuit_breaker_timeout=dict(type='int', default=30),
+        onms_throttle_file=dict(type='path', default='~/.ansible/opennms_throttle.json')
     )
 
     # Define defaults
@@ -35,6 +62,11 @@ class ONMSModule(AnsibleModule):
 
         super(ONMSModule, self).__init__(full_argspec, **kwargs)
 
+        self.setup()
+
+    def setup(self):
+        """Validate the connection parameters once they are loaded."""
+
         self.host = self.params['onms_host']
         self.username = self.params.get('onms_username')
         self.password = self.params.get('onms_password')
@@ -48,12 +80,124 @@ class ONMSModule(AnsibleModule):
         except Exception as e:
             self.fail_json(msg="Unable to parse host as a URL ({1}): {0}".format(self.host, e))
 
-        hostname = self.url.netloc.split(':')[0]
+    def resolve_host(self, host, port, refresh=False):
+        """Returns the IPv4 and IPv6 addresses of the host.
+
+        The addresses are cached in memory for onms_dns_cache_ttl seconds.
+        Module runs only share them when the onms_dns_cache file is set,
+        then the host is resolved once for many module runs. The host is
+        only resolved when a connection is opened.
+
+        Parameters
+        ----------
+        host : str
+            Host name or IP address
+        port : int
+            Port of the connection
+        refresh : bool, optional
+            Ignore the cached addresses (Default is False)
+
+        Returns
+        -------
+        addresses : list
+            The getaddrinfo results for a TCP connection
+        """
+        return self._resolve(host, port, refresh)[0]
+
+    def _resolve(self, host, port, refresh):
+        """Returns the addresses of the host and if they came from the cache."""
+        key = "{0}:{1}".format(host, port)
+        ttl = self.params.get('onms_dns_cache_ttl') or 0
+        cache_file = self.params.get('onms_dns_cache')
+        if cache_file:
+            cache_file = os.path.expanduser(cache_file)
+
+        if ttl > 0 and not refresh:
+            with _ADDRESS_CACHE_LOCK:
+                cached = _ADDRESS_CACHE.get(key)
+            if cached is None and cache_file:
+                cached = self._read_cache(cache_file).get(key)
+            if cached is not None and time.time() - cached['time'] < ttl:
+                with _ADDRESS_CACHE_LOCK:
+                    _ADDRESS_CACHE[key] = cached
+                return [tuple(address[:3]) + ('', tuple(address[3])) for address in cached['addresses']], True
+
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        self.debug(msg="Host {0} resolved to {1}".format(host, ', '.join(address[4][0] for address in addresses)))
+
+        if ttl > 0:
+            cached = {
+                'time': time.time(),
+                'addresses': [[family, socktype, proto, list(sockaddr)] for family, socktype, proto, canonname, sockaddr in addresses]
+            }
+            with _ADDRESS_CACHE_LOCK:
+                _ADDRESS_CACHE[key] = cached
+            if cache_file:
+                self._write_cache(cache_file, key, cached, ttl)
+        return addresses, False
+
+    def _read_cache(self, cache_file):
+        """Returns the entries of a cache file, empty when it can not be read."""
         try:
-            self._resolvehost = gethostbyname(hostname)
-            self.debug(msg="Host resolved to {0}".format(self._resolvehost))
+            with open(cache_file) as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _write_cache(self, cache_file, key, cached, ttl):
+        """Adds the entry to the cache file and removes the expired entries."""
+        entries = self._read_cache(cache_file)
+        now = time.time()
+        entries = dict((name, entry) for name, entry in entries.items() if now - entry.get('time', 0) < ttl)
+        entries[key] = cached
+        temp = "{0}.{1}.tmp".format(cache_file, os.getpid())
+        try:
+            directory = os.path.dirname(cache_file)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory, 0o700)
+            fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.rename(temp, cache_file)
         except Exception as e:
-            self.fail_json(msg="Unable to resolve host ({1}): {0}".format(hostname, e))
+            self.debug(msg="Unable to write the cache {0}: {1}".format(cache_file, e))
+
+    def create_connection(self, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+        """Connects to the first reachable address of the host.
+
+        Replaces socket.create_connection for the HTTP connections. When none
+        of the cached addresses can be reached the host is resolved again.
+        """
+        host, port = address
+        addresses, cached = self._resolve(host, port, False)
+        try:
+            return self._connect(addresses, timeout, source_address)
+        except socket.timeout:
+            raise
+        except socket.error:
+            if not cached:
+                raise
+        return self._connect(self.resolve_host(host, port, refresh=True), timeout, source_address)
+
+    def _connect(self, addresses, timeout, source_address):
+        error = None
+        for family, socktype, proto, canonname, sockaddr in addresses:
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                return sock
+            except socket.error as e:
+                error = e
+                if sock is not None:
+                    sock.close()
+        if error is not None:
+            raise error
+        raise socket.error("getaddrinfo returns an empty list")
 
     def build_url(self, endpoint, query_params=None, version=1):
         """
@@ -74,5 +218,9 @@ class ONMSModule(AnsibleModule):
         if not endpoint.startswith("/opennms/"):
             endpoint = "/opennms{0}".format(endpoint)
 
-        url = self.url._replace(path=endpoint)
+        query = ''
+        if query_params:
+            query = urlencode(query_params)
+
+        url = self.url._replace(path=endpoint, query=query)
         return url
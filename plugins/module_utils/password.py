@@ -0,0 +1,131 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils._text import to_bytes, to_text
+from binascii import hexlify
+from hashlib import sha256
+from hashlib import md5
+import base64
+import hmac
+import random
+
+SALT_SIZE = 16
+HASH_ITER = 100000
+
+
+def md5_digest(message):
+    """
+    This hashes a md5 password for OpenNMS users.
+    Not recommended.  Use salted hash instead.
+
+    """
+    input = bytearray(to_bytes(message, 'utf_8'))
+
+    message_digest = md5(input).digest()
+
+    return to_text(hexlify(message_digest)).upper()
+
+
+def salt_digest(message, salt_size, iter, salt_string=None):
+    """
+    This hashes a salted password for OpenNMS users.
+
+    message = The string to convert to the salt hash.
+    salt_size = The size of the salt to use.
+    iter = The amount of times to iterate using the hash.
+    salt_string = Use a predefined salt that gets hashed using MD5.
+
+    The steps taken for creating the digest
+    1. The string message is converted to byte array
+    2. A random 16 byte salt is generated
+    3. The salt bytes are added to the message (salt + message)
+    4. The sha256 hash function is applied to the salt and message
+    5. The results of the hash will be iterated 100000 times
+    6. The salt and final result of the hash are concatenated (salt + hash)
+    7. The concatenation is encoded in BASE64 and returned as a string
+
+    References
+    http://www.jasypt.org/api/jasypt/1.8/org/jasypt/util/password/StrongPasswordEncryptor.html#constructor_detail
+    https://github.com/jboss-fuse/jasypt/blob/master/jasypt/src/main/java/org/jasypt/digest/StandardStringDigester.java
+    https://github.com/jboss-fuse/jasypt/blob/master/jasypt/src/main/java/org/jasypt/digest/StandardByteDigester.java
+    https://github.com/jboss-fuse/jasypt/blob/master/jasypt/src/main/java/org/jasypt/util/password/StrongPasswordEncryptor.java
+    """
+    salt = generate_salt(salt_size, salt_string)
+
+    return hash_salt(message, salt, iter)
+
+
+def generate_salt(salt_size, salt_string=None):
+    """
+    Returns the salt used by salt_digest.
+
+    salt_size = The size of the salt to use.
+    salt_string = Use a predefined salt that gets hashed using MD5.
+    """
+    if salt_string is None:
+        salt_array = bytearray()
+        for i in range(0, salt_size):
+            salt_array.append(random.randint(0, 255))
+    else:
+        _salt_md5 = md5(to_bytes(salt_string, 'utf_8')).digest()
+        salt_array = bytearray(_salt_md5)
+
+    return salt_array
+
+
+def hash_salt(message, salt_array, iter):
+    """
+    Hashes the message with an existing salt and returns the BASE64 digest.
+
+    message = The string to convert to the salt hash.
+    salt_array = The salt bytes from generate_salt.
+    iter = The amount of times to iterate using the hash.
+    """
+    input = bytearray(to_bytes(message, 'utf_8'))
+
+    salt = salt_array
+
+    message_digest = salt + input
+
+    _hash = message_digest
+    for i in range(0, iter):
+        _hash = sha256(message_digest).digest()
+        message_digest = _hash
+
+    final_digest = salt_array + message_digest
+
+    message_base64 = base64.b64encode(final_digest)
+
+    return message_base64.decode('utf_8')
+
+
+def verify_password(message, password_hash, salted=True, iter=HASH_ITER):
+    """
+    Checks a plain text password against an existing OpenNMS hash.
+
+    message = The plain text password.
+    password_hash = The hash stored for the user.
+    salted = The hash is a salted hash instead of MD5.
+    iter = The amount of times the salted hash was iterated.
+
+    The salt is read from the first bytes of the salted hash and the password
+    is hashed again with it, the same way salt_digest creates the hash.
+    """
+    if not password_hash:
+        return False
+
+    if not salted:
+        return md5_digest(message) == password_hash.upper()
+
+    try:
+        digest = bytearray(base64.b64decode(password_hash))
+    except Exception:
+        return False
+    if len(digest) != SALT_SIZE + sha256().digest_size:
+        return False
+
+    salt_array = digest[:SALT_SIZE]
+    return hmac.compare_digest(hash_salt(message, salt_array, iter), to_text(password_hash))
@@ -0,0 +1,149 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from .api import timer
+from .retry import backoff_delays
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils._text import to_native
+import json
+import time
+
+INFO_ENDPOINT = '/info'
+HEALTH_ENDPOINT = '/health'
+API_VERSION = 1
+# Responses that mean the server can not become ready by waiting longer
+FATAL_STATUS_CODES = (401, 403)
+
+READY_ARGSPEC = dict(
+    timeout=dict(type='int', default=300),
+    request_timeout=dict(type='int', default=10),
+    initial_delay=dict(type='float', default=1.0),
+    max_delay=dict(type='float', default=30.0),
+    backoff=dict(type='float', default=2.0),
+    jitter=dict(type='bool', default=True),
+    health=dict(type='bool', default=False),
+    health_checks=dict(type='list', elements='str', default=[])
+)
+
+
+class NotReady(Exception):
+    """The server answered but is not ready yet."""
+
+
+def _read_json(response):
+    body = response.read()
+    if not body:
+        return {}
+    return json.loads(body)
+
+
+def failed_health_checks(health, checks):
+    """Returns the descriptions of the health checks that did not succeed.
+
+    Parameters
+    ----------
+    health : dict
+        Response of the health endpoint
+    checks : list
+        Text in the descriptions of the checks that must succeed, all the
+        checks when empty
+
+    Returns
+    -------
+    failed : list
+        Descriptions of the failed checks
+    """
+    responses = health.get('responses') or []
+    failed = []
+    for response in responses:
+        description = response.get('description', '')
+        if checks and not any(check.lower() in description.lower() for check in checks):
+            continue
+        if response.get('status', '').lower() != 'success':
+            failed.append(description)
+    for check in checks:
+        if not any(check.lower() in response.get('description', '').lower() for response in responses):
+            failed.append(check)
+    if not checks and not failed and not health.get('healthy', False):
+        failed.append('healthy')
+    return failed
+
+
+def check_ready(module):
+    """Returns the server info once a single poll finds the server ready.
+
+    Raises NotReady when the server answered but is not ready, and the
+    request errors when it did not answer.
+    """
+    params = module.params
+    response = module.open_url('GET', module.build_url(INFO_ENDPOINT, version=API_VERSION).geturl(), headers={'Accept': 'application/json'})
+    info = _read_json(response)
+
+    if params['health']:
+        url = module.build_url(HEALTH_ENDPOINT, version=API_VERSION).geturl()
+        try:
+            response = module.open_url('GET', url, headers={'Accept': 'application/json'})
+        except HTTPError as e:
+            # The health endpoint answers 503 with the failed checks
+            if e.code != 503:
+                raise
+            response = e
+        failed = failed_health_checks(_read_json(response), params['health_checks'])
+        if failed:
+            raise NotReady("Health checks not successful: {0}".format(', '.join(failed)))
+    return info
+
+
+def wait_for_ready(module):
+    """Polls the server of the module params until it is ready and returns the result."""
+
+    params = module.params
+    result = dict(
+        changed=False,
+        failed=False,
+        ready=False,
+        attempts=0
+    )
+
+    started = timer()
+    deadline = started + params['timeout']
+    delays = backoff_delays(params['initial_delay'], params['max_delay'], params['backoff'], params['jitter'])
+    # The server is polled here, requests are not retried and are sent while the circuit is open
+    module.retries = 0
+    module.throttle.fail_fast = False
+    last_error = None
+
+    while True:
+        result['attempts'] += 1
+        module.pool.timeout = max(min(params['request_timeout'], deadline - timer()), 1)
+        try:
+            info = check_ready(module)
+        except HTTPError as e:
+            if e.code in FATAL_STATUS_CODES:
+                module.fail_json(msg="The host rejected the credentials of user {0} ({1})".format(module.username, e.code), **result)
+            last_error = "HTTP {0}".format(e.code)
+        except NotReady as e:
+            last_error = to_native(e)
+        except Exception as e:
+            last_error = to_native(e)
+        else:
+            result.update(
+                ready=True,
+                elapsed=round(timer() - started, 3),
+                version=info.get('displayVersion', info.get('version')),
+                info=info
+            )
+            return result
+
+        remaining = deadline - timer()
+        if remaining <= 0:
+            result['elapsed'] = round(timer() - started, 3)
+            module.fail_json(
+                msg="OpenNMS was not ready after {0} seconds: {1}".format(params['timeout'], last_error),
+                last_error=last_error,
+                **result
+            )
+        time.sleep(min(next(delays), remaining))
@@ -0,0 +1,71 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import xml.etree.ElementTree as ET
+
+API_ENDPOINT = '/events'
+API_VERSION = 1
+XML_NAMESPACE = 'http://xmlns.opennms.org/xsd/event'
+RELOAD_UEI = 'uei.opennms.org/internal/reloadDaemonConfig'
+
+RELOAD_ARGSPEC = dict(
+    daemon=dict(type='str', required=True),
+    config_file=dict(type='str'),
+    source=dict(type='str', default='ansible')
+)
+
+
+def generate_event_xml(daemon, config_file=None, source='ansible'):
+    """Returns the XML of the event asking a daemon to reload its configuration.
+
+    Parameters
+    ----------
+    daemon : str
+        Name of the daemon, like Notifd or Pollerd
+    config_file : str, optional
+        Configuration file the daemon reloads (Default is all its files)
+    source : str, optional
+        Source of the event (Default is ansible)
+
+    Returns
+    -------
+    event : bytes
+        The event XML
+    """
+    xml_root = ET.Element('event', xmlns=XML_NAMESPACE)
+    ET.SubElement(xml_root, 'uei').text = RELOAD_UEI
+    ET.SubElement(xml_root, 'source').text = source
+
+    parms = {'daemonName': daemon}
+    if config_file is not None:
+        parms['configFile'] = config_file
+
+    xml_parms = ET.SubElement(xml_root, 'parms')
+    for name in sorted(parms):
+        xml_parm = ET.SubElement(xml_parms, 'parm')
+        ET.SubElement(xml_parm, 'parmName').text = name
+        ET.SubElement(xml_parm, 'value', type='string', encoding='text').text = parms[name]
+
+    return ET.tostring(xml_root)
+
+
+def manage_reload(module):
+    """Sends the reload event of the module params and returns the result."""
+
+    params = module.params
+    result = dict(
+        changed=True,
+        failed=False,
+        daemon=params['daemon'],
+        uei=RELOAD_UEI
+    )
+
+    if module.check_mode:
+        return result
+
+    data = generate_event_xml(params['daemon'], params['config_file'], params['source'])
+    module.post(API_ENDPOINT, version=API_VERSION, data=data, xml_data=True)
+    return result
@@ -0,0 +1,334 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.six import iteritems
+from xml.sax.saxutils import quoteattr
+import json
+import os
+
+try:
+    import yaml
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+API_ENDPOINT = '/requisitions'
+API_VERSION = 1
+XML_NAMESPACE = 'http://xmlns.opennms.org/xsd/config/model-import'
+
+# Node options and the attributes of the node element
+NODE_ATTRIBUTES = (
+    ('foreign_id', 'foreign-id'),
+    ('node_label', 'node-label'),
+    ('location', 'location'),
+    ('building', 'building'),
+    ('city', 'city'),
+    ('parent_foreign_source', 'parent-foreign-source'),
+    ('parent_foreign_id', 'parent-foreign-id'),
+    ('parent_node_label', 'parent-node-label')
+)
+
+INTERFACE_ARGSPEC = dict(
+    ip_addr=dict(type='str', required=True),
+    description=dict(type='str'),
+    snmp_primary=dict(type='str', choices=['P', 'S', 'N'], default='N'),
+    status=dict(type='int', default=1),
+    services=dict(type='list', elements='str', default=[])
+)
+
+NODE_ARGSPEC = dict(
+    foreign_id=dict(type='str', required=True),
+    node_label=dict(type='str', required=True),
+    location=dict(type='str'),
+    building=dict(type='str'),
+    city=dict(type='str'),
+    parent_foreign_source=dict(type='str'),
+    parent_foreign_id=dict(type='str'),
+    parent_node_label=dict(type='str'),
+    interfaces=dict(type='list', elements='dict', options=INTERFACE_ARGSPEC, default=[]),
+    categories=dict(type='list', elements='str', default=[]),
+    assets=dict(type='dict', default={}),
+    metadata=dict(type='dict', default={})
+)
+
+REQUISITION_ARGSPEC = dict(
+    name=dict(type='str', required=True),
+    nodes=dict(type='list', elements='dict', options=NODE_ARGSPEC),
+    nodes_file=dict(type='path'),
+    purge=dict(type='bool', default=True),
+    import_changes=dict(type='bool', default=True),
+    rescan_existing=dict(type='str', choices=['true', 'false', 'dbonly'], default='false')
+)
+
+REQUISITION_MUTUALLY_EXCLUSIVE = [['nodes', 'nodes_file']]
+# Purging against a missing node list would remove every node
+REQUISITION_REQUIRED_ONE_OF = [['nodes', 'nodes_file']]
+
+
+def normalize_node(node):
+    """Returns the node in the form used to compare and write requisitions.
+
+    Nodes from the module options, a nodes file and the API all end up in the
+    same form so they can be compared by value. Optional attributes that are
+    not set are left out, lists are sorted.
+
+    Parameters
+    ----------
+    node : dict
+        Node with the options of NODE_ARGSPEC
+
+    Returns
+    -------
+    node : dict
+        The normalized node
+    """
+    for name in ('foreign_id', 'node_label'):
+        if not node.get(name):
+            raise ValueError("Every node requires {0}: {1}".format(name, json.dumps(node, sort_keys=True, default=str)))
+
+    result = {}
+    for name, attribute in NODE_ATTRIBUTES:
+        if node.get(name) is not None:
+            result[name] = to_text(node[name])
+
+    interfaces = []
+    for interface in node.get('interfaces') or []:
+        if not interface.get('ip_addr'):
+            raise ValueError("Every interface of node {0} requires ip_addr".format(node['foreign_id']))
+        status = interface.get('status')
+        item = {
+            'ip_addr': to_text(interface['ip_addr']),
+            'snmp_primary': to_text(interface.get('snmp_primary') or 'N'),
+            'status': 1 if status is None else int(status),
+            'services': sorted(set(to_text(service) for service in interface.get('services') or []))
+        }
+        if item['snmp_primary'] not in ('P', 'S', 'N'):
+            raise ValueError("snmp_primary of interface {0} must be P, S or N".format(item['ip_addr']))
+        if interface.get('description') is not None:
+            item['description'] = to_text(interface['description'])
+        interfaces.append(item)
+    result['interfaces'] = sorted(interfaces, key=lambda item: item['ip_addr'])
+
+    result['categories'] = sorted(set(to_text(category) for category in node.get('categories') or []))
+    result['assets'] = dict((to_text(name), to_text(value)) for name, value in iteritems(node.get('assets') or {}))
+    result['metadata'] = dict((to_text(name), to_text(value)) for name, value in iteritems(node.get('metadata') or {}))
+    return result
+
+
+def node_from_api(node):
+    """Returns the normalized node of a requisition returned by the API."""
+    options = {}
+    for name, attribute in NODE_ATTRIBUTES:
+        if node.get(attribute) not in (None, ''):
+            options[name] = node[attribute]
+
+    options['interfaces'] = []
+    for interface in node.get('interface') or []:
+        options['interfaces'].append({
+            'ip_addr': interface.get('ip-addr'),
+            'description': interface.get('descr'),
+            'snmp_primary': interface.get('snmp-primary'),
+            'status': interface.get('status'),
+            'services': [service.get('service-name') for service in interface.get('monitored-service') or []]
+        })
+    options['categories'] = [category.get('name') for category in node.get('category') or []]
+    options['assets'] = dict((asset.get('name'), asset.get('value')) for asset in node.get('asset') or [])
+    options['metadata'] = dict(
+        (item.get('key'), item.get('value')) for item in node.get('meta-data') or [] if item.get('context', 'requisition') == 'requisition'
+    )
+    return normalize_node(options)
+
+
+def generate_xml(name, nodes):
+    """Returns the requisition XML.
+
+    The document is written as text instead of building an ElementTree,
+    which is faster for large requisitions. The whole document is returned
+    since the request body may be compressed and sent more than once.
+
+    Parameters
+    ----------
+    name : str
+        Foreign source of the requisition
+    nodes : iterable
+        Normalized nodes
+
+    Returns
+    -------
+    xml : bytes
+        The XML document
+    """
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<model-import xmlns={0} foreign-source={1}>\n'.format(
+        quoteattr(XML_NAMESPACE), quoteattr(name)
+    )]
+    for node in nodes:
+        parts.append('<node')
+        for option, attribute in NODE_ATTRIBUTES:
+            if option in node:
+                parts.append(' {0}={1}'.format(attribute, quoteattr(node[option])))
+        parts.append('>')
+
+        for interface in node['interfaces']:
+            parts.append('<interface ip-addr={0} status="{1}" snmp-primary={2}'.format(
+                quoteattr(interface['ip_addr']), interface['status'], quoteattr(interface['snmp_primary'])
+            ))
+            if 'description' in interface:
+                parts.append(' descr={0}'.format(quoteattr(interface['description'])))
+            parts.append('>')
+            for service in interface['services']:
+                parts.append('<monitored-service service-name={0}/>'.format(quoteattr(service)))
+            parts.append('</interface>')
+
+        for category in node['categories']:
+            parts.append('<category name={0}/>'.format(quoteattr(category)))
+        for asset in sorted(node['assets']):
+            parts.append('<asset name={0} value={1}/>'.format(quoteattr(asset), quoteattr(node['assets'][asset])))
+        for key in sorted(node['metadata']):
+            parts.append('<meta-data context="requisition" key={0} value={1}/>'.format(quoteattr(key), quoteattr(node['metadata'][key])))
+
+        parts.append('</node>\n')
+    parts.append('</model-import>\n')
+    return to_bytes(''.join(parts))
+
+
+def load_nodes_file(path):
+    """Returns the nodes of a JSON or YAML file holding a list of nodes."""
+    path = os.path.expanduser(path)
+    with open(path, 'rb') as f:
+        content = to_text(f.read())
+
+    if path.endswith('.json'):
+        nodes = json.loads(content)
+    elif HAS_YAML:
+        nodes = yaml.safe_load(content)
+    else:
+        try:
+            nodes = json.loads(content)
+        except ValueError:
+            raise ValueError("PyYAML is required to read the YAML nodes file {0}".format(path))
+
+    if isinstance(nodes, dict) and 'nodes' in nodes:
+        nodes = nodes['nodes']
+    if not isinstance(nodes, list):
+        raise ValueError("The nodes file {0} must contain a list of nodes".format(path))
+    return nodes
+
+
+class OpennmsRequisition:
+
+    def __init__(self, module, name):
+        """Initialize class.
+
+        Parameters
+        ----------
+        module : ONMSAPIModule
+            Module used to send the API requests
+        name : str
+            Foreign source of the requisition
+        """
+        self.module = module
+        self.name = name
+        self.endpoint = API_ENDPOINT + '/' + name
+        self.api_result = module.get(self.endpoint, version=API_VERSION, ignore_404=True)
+
+    def exists(self):
+        return bool(self.api_result and self.api_result['json'])
+
+    def get_nodes(self):
+        """Returns the normalized nodes of the existing requisition by foreign id."""
+        nodes = {}
+        if not self.exists():
+            return nodes
+        api_nodes = self.api_result['json'].get('node') or []
+        if isinstance(api_nodes, dict):
+            api_nodes = [api_nodes]
+        for node in api_nodes:
+            node = node_from_api(node)
+            nodes[node['foreign_id']] = node
+        return nodes
+
+    def save(self, nodes):
+        """Replaces the requisition with the nodes in a single request."""
+        self.module.post(API_ENDPOINT, version=API_VERSION, data=generate_xml(self.name, nodes), xml_data=True)
+
+    def import_nodes(self, rescan_existing):
+        """Synchronizes the requisition with the nodes in the database."""
+        self.module.put(self.endpoint + '/import', version=API_VERSION, query_params={'rescanExisting': rescan_existing})
+
+
+def compare_nodes(existing, desired):
+    """Returns the foreign ids that are added, modified and removed."""
+    added = sorted(foreign_id for foreign_id in desired if foreign_id not in existing)
+    removed = sorted(foreign_id for foreign_id in existing if foreign_id not in desired)
+    modified = sorted(foreign_id for foreign_id in desired if foreign_id in existing and existing[foreign_id] != desired[foreign_id])
+    return added, modified, removed
+
+
+def manage_requisition(module):
+    """Brings the requisition of the module params to its state and returns the result."""
+
+    result = dict(
+        changed=False,
+        failed=False,
+        added=[],
+        modified=[],
+        removed=[],
+        imported=False
+    )
+
+    params = module.params
+    requisition = OpennmsRequisition(module, params['name'])
+
+    if params['nodes_file'] is not None:
+        try:
+            node_list = load_nodes_file(params['nodes_file'])
+        except Exception as e:
+            module.fail_json(msg="Unable to read the nodes file {0}: {1}".format(params['nodes_file'], e))
+    else:
+        node_list = params['nodes'] or []
+
+    desired = {}
+    for node in node_list:
+        if not isinstance(node, dict):
+            module.fail_json(msg="Every node must be a dict: {0}".format(node))
+        try:
+            node = normalize_node(node)
+        except (ValueError, TypeError) as e:
+            module.fail_json(msg=to_text(e))
+        if node['foreign_id'] in desired:
+            module.fail_json(msg="The foreign id {0} is defined more than once".format(node['foreign_id']))
+        desired[node['foreign_id']] = node
+
+    existing = requisition.get_nodes()
+    if not params['purge']:
+        for foreign_id, node in iteritems(existing):
+            desired.setdefault(foreign_id, node)
+
+    added, modified, removed = compare_nodes(existing, desired)
+    result.update(added=added, modified=modified, removed=removed)
+    changed = bool(added or modified or removed) or not requisition.exists()
+    if not changed:
+        return result
+
+    if module._diff:
+        result['diff'] = {
+            'before': dict((foreign_id, existing[foreign_id]) for foreign_id in modified + removed),
+            'after': dict((foreign_id, desired[foreign_id]) for foreign_id in added + modified)
+        }
+
+    result['changed'] = True
+    result['msg'] = "Nodes added: {0}, modified: {1}, removed: {2}.".format(len(added), len(modified), len(removed))
+    if module.check_mode:
+        result['imported'] = params['import_changes']
+        return result
+
+    requisition.save(desired[foreign_id] for foreign_id in sorted(desired))
+    if params['import_changes']:
+        requisition.import_nodes(params['rescan_existing'])
+        result['imported'] = True
+
+    return result
@@ -0,0 +1,251 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils.urls import ConnectionError
+from email.utils import parsedate_tz, mktime_tz
+import json
+import os
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # The state is only shared by the threads of a process
+    fcntl = None
+
+# Entries of the state file unused for this many seconds are removed
+STATE_EXPIRY = 3600
+
+# State of each host when there is no state file
+_STATE = {}
+_STATE_LOCK = threading.Lock()
+
+
+class CircuitOpenError(ConnectionError):
+    """The server failed too many times in a row, requests fail without being sent."""
+
+
+def backoff_delays(initial_delay, max_delay, backoff, jitter=True, rand=random.random):
+    """Yields the seconds to wait before each next attempt.
+
+    The delay grows by the backoff factor up to max_delay. With jitter the
+    second half of every delay is random so clients started together do
+    not poll in step.
+
+    Parameters
+    ----------
+    initial_delay : float
+        Delay before the second attempt
+    max_delay : float
+        Largest delay
+    backoff : float
+        Factor applied to the delay after each attempt
+    jitter : bool, optional
+        Randomize the delays (Default is True)
+    rand : callable, optional
+        Returns a float between 0 and 1 (Default is random.random)
+
+    Yields
+    ------
+    delay : float
+        Seconds to wait
+    """
+    delay = initial_delay
+    while True:
+        bounded = min(delay, max_delay)
+        yield bounded / 2 + rand() * bounded / 2 if jitter else bounded
+        delay *= backoff
+
+
+def parse_retry_after(value, now=None):
+    """Returns the seconds to wait of a Retry-After header.
+
+    Parameters
+    ----------
+    value : str
+        Header value, a number of seconds or an HTTP date
+    now : float, optional
+        Current time for an HTTP date (Default is time.time())
+
+    Returns
+    -------
+    delay : float
+        Seconds to wait or None when the value is not valid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(float(mktime_tz(parsed)) - (time.time() if now is None else now), 0.0)
+
+
+class Throttle:
+    """Rate limit and circuit breaker of the requests to a host.
+
+    Requests take a token from a bucket refilled with max_rps tokens every
+    second and holding at most max_rps tokens. After failure_threshold
+    failed requests in a row the circuit opens and requests fail without
+    being sent for reset_timeout seconds, then a request is tried again.
+    Unset fail_fast to send the requests while the circuit is open and
+    still count them.
+
+    The state is kept in a JSON file locked while it is updated, so the
+    forks of a play running on the same machine share the limit. Without a
+    file, or where files can not be locked, the state is only shared by the
+    threads of the process.
+    """
+
+    def __init__(self, key, path=None, max_rps=0, failure_threshold=0, reset_timeout=30, clock=time.time, sleep=time.sleep, warn=None):
+        """Initialize class.
+
+        Parameters
+        ----------
+        key : str
+            Name of the state of the host in the file
+        path : str, optional
+            State file shared by the processes
+        max_rps : float, optional
+            Requests per second, 0 for no limit
+        failure_threshold : int, optional
+            Failures in a row opening the circuit, 0 to never open it
+        reset_timeout : float, optional
+            Seconds the circuit stays open
+        clock : callable, optional
+            Returns the current time (Default is time.time)
+        sleep : callable, optional
+            Waits a number of seconds (Default is time.sleep)
+        warn : callable, optional
+            Reports that the state file can not be used
+        """
+        self.key = key
+        self.path = os.path.expanduser(path) if path and fcntl is not None else None
+        self.max_rps = float(max_rps or 0)
+        self.failure_threshold = failure_threshold or 0
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.warn = warn
+        self.fail_fast = True
+        # Failures seen in the last update, successes need no update without them
+        self._failures = None
+
+    @property
+    def enabled(self):
+        return self.max_rps > 0 or self.failure_threshold > 0
+
+    def acquire(self):
+        """Waits for a token of the rate limit.
+
+        Raises CircuitOpenError when the circuit is open.
+
+        Returns
+        -------
+        delay : float
+            Seconds waited
+        """
+        if not self.enabled:
+            return 0.0
+        if self.max_rps <= 0:
+            self._check_circuit(self._read().get(self.key, {}))
+            return 0.0
+
+        delay = self._update(self._take_token)
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+    def record(self, success):
+        """Counts a request that succeeded or failed for the circuit breaker."""
+        if not self.enabled:
+            return
+        if success:
+            if self._failures == 0:
+                return
+            self._update(self._reset_failures)
+        elif self.failure_threshold > 0:
+            self._update(self._add_failure)
+
+    def _check_circuit(self, state):
+        self._failures = state.get('failures', 0)
+        remaining = state.get('open_until', 0) - self.clock()
+        if self.fail_fast and self.failure_threshold > 0 and self._failures >= self.failure_threshold and remaining > 0:
+            raise CircuitOpenError("{0} requests failed in a row, not sending requests for {1:.0f} seconds".format(self._failures, remaining))
+
+    def _take_token(self, state, now):
+        self._check_circuit(state)
+        tokens = state.get('tokens', self.max_rps)
+        tokens = min(self.max_rps, tokens + (now - state.get('time', now)) * self.max_rps) - 1
+        state.update(tokens=tokens, time=now)
+        # A missing token is reserved, wait until it has been refilled
+        return -tokens / self.max_rps if tokens < 0 else 0.0
+
+    def _reset_failures(self, state, now):
+        state.pop('open_until', None)
+        state['failures'] = self._failures = 0
+        state.setdefault('time', now)
+
+    def _add_failure(self, state, now):
+        failures = state.get('failures', 0) + 1
+        state['failures'] = self._failures = failures
+        state.setdefault('time', now)
+        if failures >= self.failure_threshold:
+            state['open_until'] = now + self.reset_timeout
+
+    def _read(self):
+        if self.path is None:
+            with _STATE_LOCK:
+                return dict(_STATE)
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _update(self, change):
+        """Applies the change to the state of the host and returns its result."""
+        if self.path is not None:
+            try:
+                return self._update_file(change)
+            except (IOError, OSError) as e:
+                if self.warn is not None:
+                    self.warn("Unable to use the throttle state file {0}, the state is not shared with other processes: {1}".format(self.path, e))
+                self.path = None
+        with _STATE_LOCK:
+            state = _STATE.setdefault(self.key, {})
+            return change(state, self.clock())
+
+    def _update_file(self, change):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    entries = json.load(f)
+                except ValueError:
+                    entries = {}
+                now = self.clock()
+                entries = dict(
+                    (key, entry) for key, entry in entries.items()
+                    if key == self.key or now - max(entry.get('time', 0), entry.get('open_until', 0)) < STATE_EXPIRY
+                )
+                state = entries.setdefault(self.key, {})
+                result = change(state, now)
+                f.seek(0)
+                f.truncate()
+                json.dump(entries, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return result
@@ -0,0 +1,497 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from .password import SALT_SIZE, HASH_ITER, md5_digest, salt_digest, verify_password
+from functools import partial
+import xml.etree.ElementTree as ET
+
+DAYS_OF_WEEK = {
+    'Monday': 'Mo',
+    'Tuesday': 'Tu',
+    'Wednesday': 'We',
+    'Thursday': 'Th',
+    'Friday': 'Fr',
+    'Saturday': 'Sa',
+    'Sunday': 'Su'
+}
+
+API_ENDPOINT = '/users'
+API_VERSION = 1
+
+# Fields of the user that are compared and the properties used to update them,
+# the salt flag is only sent with the password hash
+USER_PROPERTIES = {
+    'full-name': 'fullName',
+    'user-comments': 'comments',
+    'email': 'email',
+    'duty-schedule': 'dutySchedule'
+}
+# Shown in the diff instead of the password hash
+PASSWORD_MASK = '********'
+
+USER_ARGSPEC = dict(
+    name=dict(type='str', required=True),
+    password=dict(type='str', no_log=True),
+    plain_password=dict(type='str', no_log=True),
+    password_salt=dict(type='bool', default=True),
+    full_name=dict(type='str'),
+    email=dict(type='str'),
+    description=dict(type='str'),
+    duty_schedule=dict(
+        type='list',
+        elements='dict',
+        options=dict(
+            days=dict(type='list', elements='str', choices=[
+                'Monday',
+                'Tuesday',
+                'Wednesday',
+                'Thursday',
+                'Friday',
+                'Saturday',
+                'Sunday'
+            ]),
+            start_time=dict(type='int'),
+            end_time=dict(type='int')
+        )
+    ),
+    role=dict(type='list', elements='str'),
+    state=dict(type='str', choices=['present', 'absent'], default='present')
+)
+
+USER_MUTUALLY_EXCLUSIVE = [['password', 'plain_password']]
+
+USERS_ARGSPEC = dict(
+    users=dict(type='list', elements='dict', required=True, options=USER_ARGSPEC, mutually_exclusive=USER_MUTUALLY_EXCLUSIVE),
+    purge=dict(type='bool', default=False),
+    max_concurrency=dict(type='int', default=4)
+)
+
+
+class OpennmsUser:
+
+    def __init__(self, module, params=None, api_result=None, lookup=True):
+        """Initialize class.
+
+        Parameters
+        ----------
+        module : ONMSAPIModule
+            Module used to send the API requests
+        params : dict, optional
+            User options (Default is the module params)
+        api_result : dict, optional
+            Existing result of the user from the API
+        lookup : bool, optional
+            Request the user from the API when no result is provided (Default is True)
+        """
+        if params is None:
+            params = module.params
+        self.module = module
+        self.name = params.get('name')
+        self.password = params.get('password')
+        self.plain_password = params.get('plain_password')
+        self.password_salt = params.get('password_salt')
+        self.full_name = params.get('full_name')
+        self.email = params.get('email')
+        self.description = params.get('description')
+        self.duty_schedule = params.get('duty_schedule')
+        self.role = params.get('role')
+        self.endpoint = API_ENDPOINT + '/' + self.name
+        self.api_result = api_result
+        if api_result is None and lookup:
+            self.api_result = module.get(self.endpoint, version=API_VERSION, ignore_404=True)
+
+    def remove_user(self):
+        self.module.delete(self.endpoint)
+        return {
+            'changed': True,
+            'msg': "The user {0} was removed.".format(self.name)
+        }
+
+    def add_user(self):
+        if self.password is None and self.plain_password is None:
+            self.module.fail_json(msg="Password is required when adding a new user ({0}).".format(self.name))
+        self.module.post(API_ENDPOINT, version=API_VERSION, data=self.generate_xml(), xml_data=True)
+        return {
+            'changed': True,
+            'msg': "The user {0} was added.".format(self.name)
+        }
+
+    def patch_user(self, changes):
+        """Sends only the changed fields of the user to the API.
+
+        The fields are sent as a form to PUT /users/{name}, the roles are
+        added and removed one at a time with the roles of the user.
+
+        Parameters
+        ----------
+        changes : dict
+            Changed fields returned by diff
+        """
+        form = {}
+        for key, name in USER_PROPERTIES.items():
+            if key not in changes:
+                continue
+            value = changes[key][1]
+            if key == 'duty-schedule':
+                value = ','.join(value)
+            form[name] = value
+
+        if 'password' in changes or 'passwordSalt' in changes:
+            # The hash and the salt flag always change together
+            form['password'] = self._get_password_hash()
+            form['passwordSalted'] = str(self.password_salt).lower()
+
+        if form:
+            self.module.put(self.endpoint, version=API_VERSION, data=form, form_data=True)
+
+        if 'role' in changes:
+            before, after = changes['role']
+            for role in after:
+                if role not in before:
+                    self.module.put(self.endpoint + '/roles/' + role, version=API_VERSION)
+            for role in before:
+                if role not in after:
+                    self.module.delete(self.endpoint + '/roles/' + role)
+
+        return {
+            'changed': True,
+            'msg': "The user {0} was modifed.".format(self.name)
+        }
+
+    def get_user(self):
+        return self.api_result['json']
+
+    def exists(self):
+        if self.api_result is None:
+            return False
+        else:
+            return True
+
+    def generate_xml(self):
+        """Returns XML format of the user."""
+
+        xml_root = ET.Element('user')
+        xml_user = ET.SubElement(xml_root, 'user-id')
+        xml_user.text = self.name
+
+        if self.full_name is not None:
+            xml_full_name = ET.SubElement(xml_root, 'full-name')
+            xml_full_name.text = self.full_name
+
+        if self.description is not None:
+            xml_description = ET.SubElement(xml_root, 'user-comments')
+            xml_description.text = self.description
+
+        if self.email is not None:
+            xml_email = ET.SubElement(xml_root, 'email')
+            xml_email.text = self.email
+
+        xml_password = ET.SubElement(xml_root, 'password')
+        xml_password.text = self._get_password_hash()
+
+        xml_password_salt = ET.SubElement(xml_root, 'passwordSalt')
+        xml_password_salt.text = str(self.password_salt).lower()
+
+        if self.duty_schedule is not None:
+            for item in self.duty_schedule:
+                schedule = self._create_duty_schedule_string(item)
+                xml_schedule = ET.SubElement(xml_root, 'duty-schedule')
+                xml_schedule.text = schedule
+
+        if self.role is not None:
+            for item in self.role:
+                xml_role = ET.SubElement(xml_root, 'role')
+                xml_role.text = item
+
+        return ET.tostring(xml_root)
+
+    def compare(self, user):
+        """Checks if users are equal."""
+
+        return bool(self.diff(user))
+
+    def diff(self, user):
+        """Returns the fields of the user that need to change.
+
+        A plain text password is verified against the stored hash with the
+        salt of that hash, so the user is unchanged when the password is the
+        same even though a new hash would use a different salt. The salt flag
+        is only compared when the password is managed, it describes the
+        stored hash. Roles are compared without their order.
+
+        Parameters
+        ----------
+        user : dict
+            The user returned by the API
+
+        Returns
+        -------
+        changes : dict
+            The current and desired value of every changed field
+        """
+
+        desired = {
+            "full-name": self.full_name or "",
+            "user-comments": self.description or "",
+            "email": self.email or "",
+            "duty-schedule": self._create_duty_schedule_list(self.duty_schedule) or [],
+            "role": sorted(self.role or [])
+        }
+
+        current = {
+            "full-name": user.get('full-name') or "",
+            "user-comments": user.get('user-comments') or "",
+            "email": user.get('email') or "",
+            "duty-schedule": user.get('duty-schedule') or [],
+            "role": sorted(user.get('role') or [])
+        }
+
+        if self.password is not None or self.plain_password is not None:
+            desired['passwordSalt'] = self.password_salt
+            current['passwordSalt'] = user.get('passwordSalt')
+
+        changes = {}
+        for key, value in desired.items():
+            if current[key] != value:
+                changes[key] = (current[key], value)
+
+        if not self._password_matches(user.get('password'), user.get('passwordSalt')):
+            changes['password'] = (PASSWORD_MASK, PASSWORD_MASK + ' (changed)')
+
+        return changes
+
+    def describe(self, user=None):
+        """Returns the fields of the user shown in the diff.
+
+        Parameters
+        ----------
+        user : dict, optional
+            The user returned by the API (Default is the desired user)
+        """
+        if user is not None:
+            result = dict((key, value) for key, value in user.items() if key not in ('user-id', 'password'))
+            if user.get('password'):
+                result['password'] = PASSWORD_MASK
+            return result
+
+        result = {
+            "full-name": self.full_name,
+            "user-comments": self.description,
+            "email": self.email,
+            "passwordSalt": self.password_salt,
+            "duty-schedule": self._create_duty_schedule_list(self.duty_schedule),
+            "role": self.role
+        }
+        if self.password is not None or self.plain_password is not None:
+            result['password'] = PASSWORD_MASK
+        return dict((key, value) for key, value in result.items() if value is not None)
+
+    def _password_matches(self, password_hash, salted):
+        """Checks if the desired password matches the stored hash."""
+
+        if self.plain_password is not None:
+            return verify_password(self.plain_password, password_hash, salted=salted, iter=HASH_ITER)
+
+        if self.password is None:
+            # The password is not managed
+            return True
+
+        if password_hash is None:
+            return False
+
+        if self.password == password_hash:
+            return True
+
+        # MD5 hashes are not case sensitive
+        return not salted and self.password.upper() == password_hash.upper()
+
+    def _get_password_hash(self):
+        """Returns the password hash to send to the API."""
+
+        if self.password is not None:
+            return self.password
+
+        stored_password = None
+        if self.exists():
+            stored_password = self.get_user().get('password')
+
+        if self.plain_password is None:
+            return stored_password
+
+        if self.exists() and self.get_user().get('passwordSalt') == self.password_salt \
+                and verify_password(self.plain_password, stored_password, salted=self.password_salt, iter=HASH_ITER):
+            # Keep the existing hash when the password has not changed
+            return stored_password
+
+        if self.password_salt:
+            return salt_digest(self.plain_password, salt_size=SALT_SIZE, iter=HASH_ITER)
+        return md5_digest(self.plain_password)
+
+    def _create_duty_schedule_string(self, schedule):
+        """Returns the string for the duty schedule for API usage."""
+
+        # schedule_days = [i.lower() for i in schedule['days']]
+        schedule_days = schedule['days']
+        schedule_start = schedule['start_time']
+        schedule_end = schedule['end_time']
+        result = ''
+        for day in DAYS_OF_WEEK:
+            if day in schedule_days:
+                result += DAYS_OF_WEEK[day]
+
+        result += str(schedule_start)
+        result += '-'
+        result += str(schedule_end)
+        return result
+
+    def _create_duty_schedule_list(self, schedule=None):
+        """Create the list for all duty schedules."""
+
+        if schedule is None:
+            return None
+
+        schedule_list = []
+        for item in schedule:
+            schedule_list.append(
+                self._create_duty_schedule_string(item)
+            )
+
+        return schedule_list
+
+
+def get_users(module):
+    """Returns all users on the server keyed by the user id."""
+
+    users = {}
+    for user in module.iter_collection(API_ENDPOINT, key='user', version=API_VERSION):
+        users[user['user-id']] = user
+    return users
+
+
+def format_diff(changes):
+    """Returns the Ansible diff of the changed fields."""
+    return {
+        'before': dict((key, before) for key, (before, after) in changes.items()),
+        'after': dict((key, after) for key, (before, after) in changes.items())
+    }
+
+
+def manage_user(module):
+    """Adds, updates or removes the user of the module params and returns the result."""
+
+    result = dict(
+        changed=False,
+        failed=False
+    )
+
+    opennms_user = OpennmsUser(module=module)
+
+    # User exists
+    if opennms_user.exists():
+        if module.params['state'] == 'absent':
+            # Delete user
+            if module._diff:
+                result['diff'] = {'before': opennms_user.describe(opennms_user.get_user()), 'after': {}}
+            if module.check_mode:
+                result['changed'] = True
+                return result
+            result.update(opennms_user.remove_user())
+        elif module.params['state'] == 'present':
+            # Update user
+            changes = opennms_user.diff(opennms_user.get_user())
+            if changes and module._diff:
+                result['diff'] = format_diff(changes)
+            if module.check_mode:
+                result['changed'] = bool(changes)
+                return result
+            if changes:
+                result.update(opennms_user.patch_user(changes))
+    else:
+        if module.params['state'] == 'present':
+            # Add user
+            if module._diff:
+                result['diff'] = {'before': {}, 'after': opennms_user.describe()}
+            if module.check_mode:
+                result['changed'] = True
+                return result
+            result.update(opennms_user.add_user())
+
+    return result
+
+
+def reconcile_users(module):
+    """Brings every user of the module params to its state and returns the result.
+
+    All users are requested once and compared locally. The users that need
+    to change are then sent through module.run_concurrently, existing users
+    only send the fields that changed.
+    """
+
+    result = dict(
+        changed=False,
+        failed=False,
+        added=[],
+        modified=[],
+        removed=[]
+    )
+
+    existing_users = get_users(module)
+    diff = {'before': {}, 'after': {}}
+
+    names = [user['name'] for user in module.params['users']]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg="The users are defined more than once: {0}".format(', '.join(duplicates)))
+
+    tasks = []
+    for params in module.params['users']:
+        api_result = None
+        if params['name'] in existing_users:
+            api_result = {'status_code': 200, 'json': existing_users[params['name']]}
+        opennms_user = OpennmsUser(module=module, params=params, api_result=api_result, lookup=False)
+
+        if opennms_user.exists():
+            if params['state'] == 'absent':
+                tasks.append(opennms_user.remove_user)
+                result['removed'].append(opennms_user.name)
+                diff['before'][opennms_user.name] = opennms_user.describe(opennms_user.get_user())
+            else:
+                changes = opennms_user.diff(opennms_user.get_user())
+                if changes:
+                    tasks.append(partial(opennms_user.patch_user, changes))
+                    result['modified'].append(opennms_user.name)
+                    changes = format_diff(changes)
+                    diff['before'][opennms_user.name] = changes['before']
+                    diff['after'][opennms_user.name] = changes['after']
+        elif params['state'] == 'present':
+            if opennms_user.password is None and opennms_user.plain_password is None:
+                module.fail_json(msg="Password is required when adding a new user ({0}).".format(opennms_user.name))
+            tasks.append(opennms_user.add_user)
+            result['added'].append(opennms_user.name)
+            diff['after'][opennms_user.name] = opennms_user.describe()
+
+    if module.params['purge']:
+        for name in sorted(existing_users):
+            if name in names or name == module.username:
+                continue
+            opennms_user = OpennmsUser(module=module, params={'name': name}, api_result={'status_code': 200, 'json': existing_users[name]})
+            tasks.append(opennms_user.remove_user)
+            result['removed'].append(name)
+            diff['before'][name] = opennms_user.describe(existing_users[name])
+
+    if not module.check_mode:
+        module.run_concurrently(tasks, max_concurrency=module.params['max_concurrency'])
+
+    if tasks and module._diff:
+        result['diff'] = diff
+
+    if tasks:
+        result['changed'] = True
+        result['msg'] = "Users added: {0}, modified: {1}, removed: {2}.".format(
+            len(result['added']), len(result['modified']), len(result['removed'])
+        )
+
+    return result
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: opennms_reload
+
+short_description: Reload the configuration of an OpenNMS daemon
+
+version_added: "1.1.0"
+
+description:
+  - A module to send the C(reloadDaemonConfig) event to OpenNMS.
+  - The daemon reads its configuration again without restarting OpenNMS.
+  - The event is sent every time the module runs, use it from a handler.
+
+extends_documentation_fragment: tallen116.opennms.opennms_auth
+
+options:
+    daemon:
+        description: The name of the daemon to reload, like C(Notifd), C(Pollerd) or C(Collectd).
+        required: true
+        type: str
+    config_file:
+        description:
+          - The configuration file the daemon reloads.
+          - Required by some daemons, like C(Translator), to know which file changed.
+        type: str
+    source:
+        description: The source of the event.
+        default: ansible
+        type: str
+
+author:
+  - Timothy Allen (@tallen116)
+'''
+
+EXAMPLES = r'''
+- name: Reload the notification daemon
+  tallen116.opennms.opennms_reload:
+    daemon: Notifd
+
+- name: Reload the event translator configuration
+  tallen116.opennms.opennms_reload:
+    daemon: Translator
+    config_file: translator-configuration.xml
+'''
+
+RETURN = r'''
+daemon:
+    description: The daemon asked to reload its configuration.
+    returned: always
+    type: str
+    sample: Notifd
+uei:
+    description: The UEI of the event that was sent.
+    returned: always
+    type: str
+    sample: uei.opennms.org/internal/reloadDaemonConfig
+'''
+
+from ..module_utils.api import ONMSAPIModule
+from ..module_utils.reload import RELOAD_ARGSPEC, manage_reload
+
+
+def main():
+
+    module = ONMSAPIModule(
+        argument_spec=RELOAD_ARGSPEC,
+        supports_check_mode=True
+    )
+
+    module.exit_json(**manage_reload(module))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: opennms_requisition
+
+short_description: Manage the nodes of an OpenNMS requisition
+
+version_added: "1.1.0"
+
+description:
+  - A module to provision many nodes with an OpenNMS requisition.
+  - The existing requisition is compared with the nodes by foreign id.
+  - When a node changed the whole requisition is sent in a single request and imported.
+  - The requisition XML is written one node at a time instead of building a document tree.
+  - Supports C(--diff) for the nodes that are added, modified or removed.
+
+extends_documentation_fragment: tallen116.opennms.opennms_auth
+
+options:
+    name:
+        description: The foreign source of the requisition.
+        required: true
+        type: str
+    nodes:
+        description:
+          - The nodes of the requisition.
+          - One of I(nodes) or I(nodes_file) is required, use an empty list to remove every node.
+          - Mutually exclusive with I(nodes_file).
+        type: list
+        elements: dict
+        suboptions:
+            foreign_id:
+                description: The unique id of the node in the requisition.
+                required: true
+                type: str
+            node_label:
+                description: The label of the node.
+                required: true
+                type: str
+            location:
+                description: The monitoring location of the node.
+                type: str
+            building:
+                description: The building of the node.
+                type: str
+            city:
+                description: The city of the node.
+                type: str
+            parent_foreign_source:
+                description: The foreign source of the parent node.
+                type: str
+            parent_foreign_id:
+                description: The foreign id of the parent node.
+                type: str
+            parent_node_label:
+                description: The label of the parent node.
+                type: str
+            interfaces:
+                description: The IP interfaces of the node.
+                type: list
+                elements: dict
+                default: []
+                suboptions:
+                    ip_addr:
+                        description: The IP address of the interface.
+                        required: true
+                        type: str
+                    description:
+                        description: The description of the interface.
+                        type: str
+                    snmp_primary:
+                        description: Use the interface as primary C(P), secondary C(S) or not C(N) for SNMP.
+                        choices:
+                          - P
+                          - S
+                          - N
+                        default: N
+                        type: str
+                    status:
+                        description: The status of the interface, C(1) is managed.
+                        default: 1
+                        type: int
+                    services:
+                        description: The services monitored on the interface.
+                        type: list
+                        elements: str
+                        default: []
+            categories:
+                description: The surveillance categories of the node.
+                type: list
+                elements: str
+                default: []
+            assets:
+                description: The asset fields of the node.
+                type: dict
+                default: {}
+            metadata:
+                description: The metadata of the node in the C(requisition) context.
+                type: dict
+                default: {}
+    nodes_file:
+        description:
+          - A JSON or YAML file with the list of nodes, using the same fields as I(nodes).
+          - The file is read where the module runs, on the controller with I(onms_run_on_controller).
+          - YAML files require PyYAML.
+          - Mutually exclusive with I(nodes).
+        type: path
+    purge:
+        description:
+          - Remove the nodes of the requisition that are not in I(nodes) or I(nodes_file).
+          - Set to C(false) to only add and modify nodes.
+        default: true
+        type: bool
+    import_changes:
+        description: Import the requisition when it changed.
+        default: true
+        type: bool
+    rescan_existing:
+        description:
+          - How the import handles the nodes that already exist.
+          - C(true) scans every node again, C(false) only scans the new nodes and C(dbonly) updates the database without scanning.
+        choices:
+          - 'true'
+          - 'false'
+          - dbonly
+        default: 'false'
+        type: str
+
+notes:
+  - Interface and service metadata are not managed and are removed when a changed requisition is sent.
+
+author:
+  - Timothy Allen (@tallen116)
+'''
+
+EXAMPLES = r'''
+- name: Provision the web servers
+  tallen116.opennms.opennms_requisition:
+    name: webservers
+    nodes:
+      - foreign_id: web01
+        node_label: web01.example.com
+        interfaces:
+          - ip_addr: 192.0.2.10
+            snmp_primary: P
+            services:
+              - ICMP
+              - HTTP
+        categories:
+          - Production
+        assets:
+          city: Raleigh
+        metadata:
+          team: web
+
+- name: Provision thousands of nodes from a file on the controller
+  tallen116.opennms.opennms_requisition:
+    name: datacenter
+    nodes_file: files/datacenter_nodes.json
+    onms_run_on_controller: true
+
+- name: Add nodes without removing the others and without scanning the existing nodes
+  tallen116.opennms.opennms_requisition:
+    name: datacenter
+    nodes: "{{ new_nodes }}"
+    purge: false
+    rescan_existing: 'false'
+'''
+
+RETURN = r'''
+added:
+    description: The foreign ids of the nodes that were added.
+    returned: always
+    type: list
+    elements: str
+    sample: ['web01']
+modified:
+    description: The foreign ids of the nodes that were modified.
+    returned: always
+    type: list
+    elements: str
+    sample: ['web02']
+removed:
+    description: The foreign ids of the nodes that were removed.
+    returned: always
+    type: list
+    elements: str
+    sample: ['web03']
+imported:
+    description: If the import of the requisition was started.
+    returned: always
+    type: bool
+    sample: true
+'''
+
+from ..module_utils.api import ONMSAPIModule
+from ..module_utils.requisition import REQUISITION_ARGSPEC, REQUISITION_MUTUALLY_EXCLUSIVE, REQUISITION_REQUIRED_ONE_OF, manage_requisition
+
+
+def main():
+
+    module = ONMSAPIModule(
+        argument_spec=REQUISITION_ARGSPEC,
+        mutually_exclusive=REQUISITION_MUTUALLY_EXCLUSIVE,
+        required_one_of=REQUISITION_REQUIRED_ONE_OF,
+        supports_check_mode=True
+    )
+
+    module.exit_json(**manage_requisition(module))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: opennms_users
+
+short_description: Manage a list of OpenNMS users
+
+version_added: "1.1.0"
+
+description:
+  - A module to add, modify, delete many OpenNMS users in a single task.
+  - All users are requested from the server once and compared locally.
+  - Only the users that have changed are sent back to the server, with only the fields that changed.
+  - Supports C(--diff), the password hash is never shown.
+
+extends_documentation_fragment: tallen116.opennms.opennms_auth
+
+options:
+    users:
+        description: The list of users to manage.
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description: The name of the user.
+                required: true
+                type: str
+            password:
+                description:
+                  - The password for the user.
+                  - Required when adding a new user.
+                  - A hash with a random salt can not be verified, use I(plain_password) to avoid updating the user on every run.
+                type: str
+            plain_password:
+                description:
+                  - The plain text password for the user.
+                  - The module hashes the password using I(password_salt).
+                  - The stored hash is verified against it so an unchanged password is never sent again.
+                  - Mutually exclusive with I(password).
+                type: str
+            password_salt:
+                description: The password salt hashing algorithm.
+                default: true
+                type: bool
+            full_name:
+                description: The full name of the user.
+                type: str
+            email:
+                description: The email address of the user.
+                type: str
+            description:
+                description: Any comment for the user.
+                type: str
+            duty_schedule:
+                description: The duty schedule for the user.
+                type: list
+                elements: dict
+                suboptions:
+                    days:
+                        description: The day of the week for the schedule.
+                        choices:
+                            - Monday
+                            - Tuesday
+                            - Wednesday
+                            - Thursday
+                            - Friday
+                            - Saturday
+                            - Sunday
+                        type: list
+                        elements: str
+                    start_time:
+                        description: The start time of the schedule depicted in 24 hour.
+                        type: int
+                    end_time:
+                        description: The end time of the schedule depicted in 24 hour.
+                        type: int
+            role:
+                description: The roles assigned to the user.
+                type: list
+                elements: str
+            state:
+                description:
+                    - The state of the user.
+                    - Set to `present` to create or update the user.
+                    - Set to `absent` to remove the user.
+                choices:
+                    - present
+                    - absent
+                type: str
+                default: present
+    purge:
+        description:
+          - Remove any user on the server that is not in I(users).
+          - The user defined in I(onms_username) is never removed.
+        default: false
+        type: bool
+    max_concurrency:
+        description:
+          - The maximum number of users sent to the server at the same time.
+          - Only used with I(onms_run_on_controller), the module on the host sends one user at a time.
+          - Requests are also limited by I(onms_max_connections).
+        default: 4
+        type: int
+
+author:
+  - Timothy Allen (@tallen116)
+'''
+
+EXAMPLES = r'''
+- name: Manage users
+  tallen116.opennms.opennms_users:
+    users:
+      - name: basic
+        password: "{{ lookup('tallen116.opennms.opennms_password', 'ansible', encrypt='salt', salt='basic') }}"
+      - name: advance
+        password: "{{ lookup('tallen116.opennms.opennms_password', 'ansible', encrypt='salt', salt='advance') }}"
+        full_name: Advance User
+        email: advance.user@localhost.local
+        role:
+          - ROLE_ADMIN
+          - ROLE_USER
+      - name: former
+        state: absent
+
+- name: Send the users from the controller, eight at a time
+  tallen116.opennms.opennms_users:
+    users: "{{ opennms_users }}"
+    onms_run_on_controller: true
+    onms_max_connections: 8
+    max_concurrency: 8
+
+- name: Remove every user not in the list
+  tallen116.opennms.opennms_users:
+    users: "{{ opennms_users }}"
+    purge: true
+'''
+
+RETURN = r'''
+added:
+    description: The users that were added.
+    returned: always
+    type: list
+    elements: str
+    sample: ['basic']
+modified:
+    description: The users that were modified.
+    returned: always
+    type: list
+    elements: str
+    sample: ['advance']
+removed:
+    description: The users that were removed.
+    returned: always
+    type: list
+    elements: str
+    sample: ['former']
+'''
+
+from ..module_utils.api import ONMSAPIModule
+from ..module_utils.user import USERS_ARGSPEC, reconcile_users
+
+
+def main():
+
+    module = ONMSAPIModule(
+        argument_spec=USERS_ARGSPEC,
+        supports_check_mode=True
+    )
+
+    module.exit_json(**reconcile_users(module))
+
+
+if __name__ == '__main__':
+    main()
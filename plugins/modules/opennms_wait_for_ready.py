@@ -0,0 +1,135 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: opennms_wait_for_ready
+
+short_description: Wait until the OpenNMS REST API is ready
+
+version_added: "1.1.0"
+
+description:
+  - A module to wait for OpenNMS after it was started or restarted.
+  - Polls C(/rest/info) and optionally C(/rest/health) until they answer successfully.
+  - The delay between attempts grows exponentially with random jitter, so the play continues soon after the server is up.
+  - Fails when the server is not ready before I(timeout) or rejects the credentials.
+
+extends_documentation_fragment: tallen116.opennms.opennms_auth
+
+options:
+    timeout:
+        description: Seconds to wait for the server before failing.
+        default: 300
+        type: int
+    request_timeout:
+        description: Seconds to wait for the response of each attempt.
+        default: 10
+        type: int
+    initial_delay:
+        description: Seconds to wait after the first attempt.
+        default: 1.0
+        type: float
+    max_delay:
+        description: Largest number of seconds between two attempts.
+        default: 30.0
+        type: float
+    backoff:
+        description: Factor applied to the delay after each attempt.
+        default: 2.0
+        type: float
+    jitter:
+        description: Randomize the second half of every delay.
+        default: true
+        type: bool
+    health:
+        description:
+          - Also wait for C(/rest/health) to report the checks as successful.
+          - Requires OpenNMS Horizon 26 or later.
+        default: false
+        type: bool
+    health_checks:
+        description:
+          - Text in the descriptions of the health checks that must succeed, like C(Eventd) or C(bundles).
+          - All the health checks must succeed when empty.
+        default: []
+        type: list
+        elements: str
+
+author:
+  - Timothy Allen (@tallen116)
+'''
+
+EXAMPLES = r'''
+- name: Wait for OpenNMS
+  tallen116.opennms.opennms_wait_for_ready:
+    onms_host: http://opennms.example.com:8980
+    timeout: 600
+
+- name: Wait for the daemons the next tasks depend on
+  tallen116.opennms.opennms_wait_for_ready:
+    health: true
+    health_checks:
+      - Eventd
+      - Provisiond
+  register: ready
+
+- name: Show the time OpenNMS took to start
+  debug:
+    msg: "OpenNMS {{ ready.version }} was ready after {{ ready.elapsed }} seconds"
+'''
+
+RETURN = r'''
+ready:
+    description: If the server was ready.
+    returned: always
+    type: bool
+    sample: true
+elapsed:
+    description: Seconds until the server was ready.
+    returned: always
+    type: float
+    sample: 42.731
+attempts:
+    description: Number of times the server was polled.
+    returned: always
+    type: int
+    sample: 6
+version:
+    description: The version of OpenNMS.
+    returned: success
+    type: str
+    sample: 26.2.2
+info:
+    description: The response of C(/rest/info).
+    returned: success
+    type: dict
+last_error:
+    description: The reason the last attempt failed.
+    returned: failure
+    type: str
+    sample: HTTP 503
+'''
+
+from ..module_utils.api import ONMSAPIModule
+from ..module_utils.ready import READY_ARGSPEC, wait_for_ready
+
+
+def main():
+
+    module = ONMSAPIModule(
+        argument_spec=READY_ARGSPEC,
+        supports_check_mode=True
+    )
+
+    module.exit_json(**wait_for_ready(module))
+
+
+if __name__ == '__main__':
+    main()
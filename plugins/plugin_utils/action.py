@@ -0,0 +1,52 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.utils.vars import merge_hash
+from ansible_collections.tallen116.opennms.plugins.module_utils.controller import run_on_controller
+
+
+class ONMSActionBase(ActionBase):
+    """Base action plugin for the OpenNMS API modules.
+
+    The module runs on the host unless onms_run_on_controller is set, in that
+    case run_module is called on the controller with an ONMSControllerModule.
+    """
+
+    ARGUMENT_SPEC = {}
+    MUTUALLY_EXCLUSIVE = None
+    REQUIRED_ONE_OF = None
+
+    _supports_check_mode = True
+    _supports_async = True
+
+    def run_module(self, module):
+        """Returns the result of the module logic."""
+        raise NotImplementedError
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ONMSActionBase, self).run(tmp, task_vars)
+        del tmp
+
+        on_controller = boolean(self._task.args.get('onms_run_on_controller', False), strict=False)
+        if not on_controller:
+            wrap_async = self._task.async_val and not self._connection.has_native_async
+            result = merge_hash(result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async))
+            if not wrap_async:
+                self._remove_tmp_path(self._connection._shell.tmpdir)
+            return result
+
+        result.update(run_on_controller(
+            self.ARGUMENT_SPEC,
+            self._task.args,
+            self.run_module,
+            check_mode=self._task.check_mode,
+            diff=self._task.diff,
+            mutually_exclusive=self.MUTUALLY_EXCLUSIVE,
+            required_one_of=self.REQUIRED_ONE_OF
+        ))
+        return result
@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Benchmarks the collection against a local stand-in OpenNMS server.
+
+Every workload runs a fixed number of times after a warm up run against a
+fresh server. The throughput of the median run is reported with the p50/p99
+duration of the runs and the p50/p99 latency of the API requests. The results
+can be written to a JSON file and compared with the results of another
+commit, the comparison fails when a workload is slower than the threshold.
+
+The collection must be in an ansible_collections/tallen116/opennms directory
+or in one of the paths of ANSIBLE_COLLECTIONS_PATH.
+
+Examples
+--------
+python tests/benchmark/bench.py --output before.json
+python tests/benchmark/bench.py --users 1,100 --latency 0.002 --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COLLECTION = os.path.dirname(os.path.dirname(HERE))
+COLLECTIONS_PATH = os.path.dirname(os.path.dirname(os.path.dirname(COLLECTION)))
+if os.path.basename(os.path.dirname(os.path.dirname(COLLECTION))) == 'ansible_collections':
+    sys.path.insert(0, COLLECTIONS_PATH)
+for path in reversed(os.environ.get('ANSIBLE_COLLECTIONS_PATH', '').split(os.pathsep)):
+    if path:
+        sys.path.insert(0, os.path.expanduser(path))
+sys.path.insert(0, HERE)
+
+from onms_server import ONMSServer  # noqa: E402
+
+try:
+    from ansible_collections.tallen116.opennms.plugins.module_utils.controller import ONMSControllerModule  # noqa: E402
+    from ansible_collections.tallen116.opennms.plugins.module_utils.password import (  # noqa: E402
+        SALT_SIZE,
+        HASH_ITER,
+        salt_digest
+    )
+    from ansible_collections.tallen116.opennms.plugins.module_utils.user import (  # noqa: E402
+        USER_ARGSPEC,
+        USERS_ARGSPEC,
+        OpennmsUser,
+        manage_user,
+        reconcile_users
+    )
+except ImportError as e:
+    sys.exit("Unable to import the collection, it must be in an ansible_collections/tallen116/opennms directory: {0}".format(e))
+
+# Hash of the benchmark user password, salt_digest is benchmarked on its own
+PASSWORD_HASH = salt_digest('bench', salt_size=SALT_SIZE, iter=HASH_ITER, salt_string='bench')
+
+
+def percentile(values, percent):
+    """Returns the nearest rank percentile of the values."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    rank = max(1, int(round(percent / 100.0 * len(values) + 0.5)))
+    return values[min(rank, len(values)) - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'], cwd=COLLECTION, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def user_params(index, email='bench@localhost'):
+    return {
+        'name': 'bench{0:05d}'.format(index),
+        'password': PASSWORD_HASH,
+        'plain_password': None,
+        'password_salt': True,
+        'full_name': 'Bench User {0}'.format(index),
+        'email': email,
+        'description': None,
+        'duty_schedule': None,
+        'role': ['ROLE_USER'],
+        'state': 'present'
+    }
+
+
+class Benchmark:
+    """Runs the workloads against one stand-in server."""
+
+    def __init__(self, server, runs=5, max_concurrency=4):
+        self.server = server
+        self.runs = runs
+        self.max_concurrency = max_concurrency
+
+    def module(self, argument_spec=None, **params):
+        args = dict(
+            onms_host=self.server.url,
+            onms_username='admin',
+            onms_password='admin',
+            onms_max_connections=self.max_concurrency,
+            onms_metrics=True
+        )
+        args.update(params)
+        return ONMSControllerModule(argument_spec or {}, args)
+
+    def seed(self, count):
+        """Adds the benchmark users to the server."""
+        self.server.reset()
+        for index in range(count):
+            params = user_params(index)
+            self.server.state.add_user({
+                'user-id': params['name'],
+                'full-name': params['full_name'],
+                'email': params['email'],
+                'password': PASSWORD_HASH,
+                'passwordSalt': True,
+                'duty-schedule': [],
+                'role': ['ROLE_USER']
+            })
+
+    def measure(self, name, operation, operations=1, setup=None, module=None):
+        """Runs the operation and returns the timing of every run.
+
+        Parameters
+        ----------
+        name : str
+            Name of the workload
+        operation : callable
+            Receives the run number and runs the workload once
+        operations : int, optional
+            Number of operations done by a single run (Default is 1)
+        setup : callable, optional
+            Receives the run number and prepares the server, not timed
+        module : ONMSControllerModule, optional
+            Module used by the operation, its metrics give the request latency
+        """
+        durations = []
+        latencies = []
+        requests = 0
+        # The first run warms up the connections and the session and is not counted
+        for run in range(self.runs + 1):
+            if setup is not None:
+                setup(run)
+            if module is not None:
+                module.metrics = []
+            before = self.server.state.requests
+            start = time.time()
+            operation(run)
+            duration = time.time() - start
+            if run == 0:
+                continue
+            durations.append(duration)
+            requests += self.server.state.requests - before
+            if module is not None:
+                latencies.extend(metric['connect'] + metric['first_byte'] + metric['read'] for metric in module.metrics)
+
+        total = sum(durations)
+        median = percentile(durations, 50)
+        return {
+            'name': name,
+            'runs': self.runs,
+            'operations': operations,
+            'requests': requests // self.runs,
+            'throughput': round(operations / median, 3) if median else 0.0,
+            'p50': round(median, 6),
+            'p99': round(percentile(durations, 99), 6),
+            'mean': round(total / self.runs, 6),
+            'request_p50': round(percentile(latencies, 50), 6),
+            'request_p99': round(percentile(latencies, 99), 6)
+        }
+
+    def bench_salt_digest(self, count=1):
+        def operation(run):
+            for index in range(count):
+                salt_digest('bench{0}'.format(index), salt_size=SALT_SIZE, iter=HASH_ITER)
+        return self.measure('salt_digest', operation, operations=count)
+
+    def bench_make_request(self, count=100):
+        self.server.reset()
+        module = self.module()
+
+        def operation(run):
+            for index in range(count):
+                module.make_request('GET', '/info')
+        try:
+            return self.measure('make_request', operation, operations=count, module=module)
+        finally:
+            module.pool.close()
+
+    def bench_iter_collection(self, users):
+        module = self.module()
+
+        def operation(run):
+            for user in module.iter_collection('/users', key='user'):
+                pass
+        try:
+            return self.measure('iter_collection/{0}'.format(users), operation, operations=users, setup=lambda run: self.seed(users), module=module)
+        finally:
+            module.pool.close()
+
+    def bench_query(self, nodes, filtered):
+        """Lists the nodes in the Servers category, filtered by the server or by the client."""
+        module = self.module()
+        self.server.reset(nodes=nodes)
+
+        def operation(run):
+            if filtered:
+                servers = list(module.query('/nodes', filters={'category.name': 'Servers'}, key='node'))
+            else:
+                servers = [
+                    node for node in module.iter_collection('/nodes', key='node', query_params={'orderBy': 'id'})
+                    if any(category['name'] == 'Servers' for category in node['categories'])
+                ]
+            assert len(servers) == (nodes + 1) // 2
+        try:
+            return self.measure(
+                'nodes/{0}/{1}'.format(nodes, 'server_filter' if filtered else 'client_filter'),
+                operation, operations=nodes, module=module
+            )
+        finally:
+            module.pool.close()
+
+    def bench_user(self, users, changed):
+        """Runs manage_user once per user, like a loop over the opennms_user module."""
+        module = self.module(USER_ARGSPEC, name='bench00000')
+
+        def operation(run):
+            email = 'run{0}@localhost'.format(run) if changed else 'bench@localhost'
+            for index in range(users):
+                module.params.update(user_params(index, email=email))
+                manage_user(module)
+        try:
+            return self.measure(
+                'opennms_user/{0}/{1}'.format(users, 'changed' if changed else 'converged'),
+                operation, operations=users, setup=lambda run: run == 0 and self.seed(users), module=module
+            )
+        finally:
+            module.pool.close()
+
+    def bench_opennms_user_compare(self, users):
+        """Compares users with the result of the API without any request."""
+        self.seed(users)
+        module = self.module()
+        api_results = [
+            {'status_code': 200, 'json': self.server.state.users[user_params(index)['name']]}
+            for index in range(users)
+        ]
+
+        def operation(run):
+            for index in range(users):
+                OpennmsUser(module, params=user_params(index), api_result=api_results[index]).compare(api_results[index]['json'])
+        try:
+            return self.measure('OpennmsUser.compare/{0}'.format(users), operation, operations=users)
+        finally:
+            module.pool.close()
+
+    def bench_users(self, users, changed):
+        """Runs reconcile_users once with every user, like the opennms_users module."""
+        module = self.module(USERS_ARGSPEC, users=[], max_concurrency=self.max_concurrency)
+
+        def operation(run):
+            email = 'run{0}@localhost'.format(run) if changed else 'bench@localhost'
+            module.params.update(
+                users=[user_params(index, email=email) for index in range(users)],
+                purge=False,
+                max_concurrency=self.max_concurrency
+            )
+            reconcile_users(module)
+        try:
+            return self.measure(
+                'opennms_users/{0}/{1}'.format(users, 'changed' if changed else 'converged'),
+                operation, operations=users, setup=lambda run: run == 0 and self.seed(users), module=module
+            )
+        finally:
+            module.pool.close()
+
+    def run(self, sizes, workloads):
+        results = []
+        if 'salt_digest' in workloads:
+            results.append(self.bench_salt_digest())
+        if 'make_request' in workloads:
+            results.append(self.bench_make_request())
+        for users in sizes:
+            if 'iter_collection' in workloads:
+                results.append(self.bench_iter_collection(users))
+            if 'compare' in workloads:
+                results.append(self.bench_opennms_user_compare(users))
+            if 'query' in workloads:
+                results.append(self.bench_query(users, False))
+                results.append(self.bench_query(users, True))
+            for changed in (False, True):
+                if 'opennms_user' in workloads:
+                    results.append(self.bench_user(users, changed))
+                if 'opennms_users' in workloads:
+                    results.append(self.bench_users(users, changed))
+        return results
+
+
+def compare(results, baseline, threshold):
+    """Prints the change of every workload and returns the regressions."""
+    previous = dict((result['name'], result) for result in baseline['results'])
+    regressions = []
+    print('\nCompared with {0}'.format(baseline.get('commit') or 'the baseline'))
+    for result in results:
+        old = previous.get(result['name'])
+        if old is None or not old['throughput']:
+            continue
+        change = (result['throughput'] - old['throughput']) / old['throughput']
+        marker = ''
+        if change < -threshold:
+            marker = '  REGRESSION'
+            regressions.append(result['name'])
+        print('{0:<32} {1:>12.3f} -> {2:>12.3f} ops/s {3:>+8.1%}{4}'.format(
+            result['name'], old['throughput'], result['throughput'], change, marker
+        ))
+    return regressions
+
+
+def main():
+    workloads = ['salt_digest', 'make_request', 'iter_collection', 'compare', 'query', 'opennms_user', 'opennms_users']
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', default='1,100,1000', help='comma separated number of users and nodes (default: %(default)s)')
+    parser.add_argument('--workloads', default=','.join(workloads), help='comma separated workloads (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5, help='runs of every workload (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request by the server')
+    parser.add_argument('--auth-cost', type=float, default=0.0, help='seconds added to every basic auth request by the server')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='connections and concurrent requests (default: %(default)s)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare the results with this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed throughput loss when comparing (default: %(default)s)')
+    args = parser.parse_args()
+
+    selected = args.workloads.split(',')
+    unknown = set(selected) - set(workloads)
+    if unknown:
+        parser.error('unknown workloads: {0}'.format(', '.join(sorted(unknown))))
+
+    config = {
+        'users': [int(users) for users in args.users.split(',')],
+        'workloads': selected,
+        'runs': args.runs,
+        'latency': args.latency,
+        'auth_cost': args.auth_cost,
+        'max_concurrency': args.max_concurrency
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print('WARNING: the baseline was run with a different configuration: {0}'.format(baseline.get('config')))
+
+    server = ONMSServer(latency=args.latency, auth_cost=args.auth_cost).start()
+    try:
+        results = Benchmark(server, runs=args.runs, max_concurrency=args.max_concurrency).run(config['users'], selected)
+    finally:
+        server.stop()
+
+    print('{0:<32} {1:>8} {2:>14} {3:>10} {4:>10} {5:>12} {6:>12}'.format(
+        'workload', 'requests', 'ops/s', 'p50 (s)', 'p99 (s)', 'req p50 (s)', 'req p99 (s)'
+    ))
+    for result in results:
+        print('{name:<32} {requests:>8} {throughput:>14.3f} {p50:>10.4f} {p99:>10.4f} {request_p50:>12.5f} {request_p99:>12.5f}'.format(**result))
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': config,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if baseline is not None and compare(results, baseline, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
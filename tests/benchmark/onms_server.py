@@ -0,0 +1,431 @@
+# Copyright: (c) 2020, Timothy Allen (@tallen116)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""A local stand-in for the OpenNMS REST API used by the benchmarks.
+
+Only the endpoints used by the collection are implemented. Every response
+can be delayed by a fixed latency and requests authenticated with basic auth
+pay an extra cost, the same way the OpenNMS server hashes the password on
+every basic auth request but not on requests with a session cookie.
+"""
+
+import base64
+import fnmatch
+import gzip
+import json
+import re
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+# Smallest response body that is compressed, like the Jetty GzipHandler
+MIN_GZIP_SIZE = 1024
+
+FIQL_COMPARISON = re.compile(r'^([\w.]+)(==|!=|=lt=|=le=|=gt=|=ge=)(.*)$')
+
+# Properties accepted by PUT /users/{name} and the fields they update
+USER_PROPERTIES = {
+    'fullName': 'full-name',
+    'comments': 'user-comments',
+    'email': 'email',
+    'password': 'password',
+    'passwordSalted': 'passwordSalt',
+    'dutySchedule': 'duty-schedule'
+}
+
+INFO = {
+    'displayVersion': '27.0.0',
+    'version': '27.0.0',
+    'packageName': 'opennms',
+    'packageDescription': 'OpenNMS'
+}
+
+HEALTH = {
+    'healthy': True,
+    'responses': [
+        {'description': 'Verifying installed bundles', 'status': 'Success', 'message': None},
+        {'description': 'Verifying Eventd', 'status': 'Success', 'message': None}
+    ]
+}
+
+
+def _split(expression, separator):
+    """Splits the expression on the separator outside of parentheses."""
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(expression):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(expression[start:index])
+            start = index + 1
+    parts.append(expression[start:])
+    return parts
+
+
+def fiql_match(expression, properties):
+    """Returns if the properties match the FIQL expression.
+
+    Only what the collection sends is supported, comparisons joined with ;
+    and groups of comparisons joined with , inside parentheses.
+    """
+    for term in _split(expression, ';'):
+        if term.startswith('(') and term.endswith(')'):
+            if not any(fiql_match(item, properties) for item in _split(term[1:-1], ',')):
+                return False
+            continue
+        match = FIQL_COMPARISON.match(term)
+        if match is None:
+            raise ValueError(term)
+        name, operator, value = match.groups()
+        value = unquote(value)
+        values = properties.get(name)
+        if not isinstance(values, list):
+            values = [values]
+        values = ['' if item is None else str(item) for item in values]
+        if operator == '==':
+            result = any(fnmatch.fnmatchcase(item, value) for item in values)
+        elif operator == '!=':
+            result = not any(fnmatch.fnmatchcase(item, value) for item in values)
+        else:
+            compare = {'=lt=': lambda a, b: a < b, '=le=': lambda a, b: a <= b, '=gt=': lambda a, b: a > b, '=ge=': lambda a, b: a >= b}[operator]
+            if value.isdigit():
+                result = any(item.isdigit() and compare(int(item), int(value)) for item in values)
+            else:
+                result = any(compare(item, value) for item in values)
+        if not result:
+            return False
+    return True
+
+
+def node_properties(node):
+    """Returns the v2 search properties of a node."""
+    return {
+        'node.id': node['id'],
+        'node.label': node['label'],
+        'node.foreignSource': node['foreignSource'],
+        'node.foreignId': node['foreignId'],
+        'node.location': node['location'],
+        'category.name': [category['name'] for category in node['categories']]
+    }
+
+
+def requisition_from_xml(body):
+    """Returns the JSON form of a requisition XML document."""
+    namespace = '{http://xmlns.opennms.org/xsd/config/model-import}'
+    root = ET.fromstring(body)
+    nodes = []
+    for node in root.findall(namespace + 'node'):
+        item = dict(node.attrib)
+        item['interface'] = []
+        for interface in node.findall(namespace + 'interface'):
+            data = dict(interface.attrib)
+            data['status'] = int(data.get('status', 1))
+            data['monitored-service'] = [dict(service.attrib) for service in interface.findall(namespace + 'monitored-service')]
+            item['interface'].append(data)
+        item['category'] = [dict(category.attrib) for category in node.findall(namespace + 'category')]
+        item['asset'] = [dict(asset.attrib) for asset in node.findall(namespace + 'asset')]
+        item['meta-data'] = [dict(data.attrib) for data in node.findall(namespace + 'meta-data')]
+        nodes.append(item)
+    return {'foreign-source': root.get('foreign-source'), 'date-stamp': int(time.time() * 1000), 'node': nodes}
+
+
+def event_from_xml(body):
+    """Returns the UEI and parameters of an event XML document."""
+    namespace = '{http://xmlns.opennms.org/xsd/event}'
+    root = ET.fromstring(body)
+    parms = dict(
+        (parm.findtext(namespace + 'parmName'), parm.findtext(namespace + 'value')) for parm in root.iter(namespace + 'parm')
+    )
+    return {'uei': root.findtext(namespace + 'uei'), 'source': root.findtext(namespace + 'source'), 'parms': parms}
+
+
+class ONMSState:
+    """Users, nodes and sessions of the stand-in server."""
+
+    def __init__(self, username='admin', password='admin', nodes=0):
+        self.lock = threading.Lock()
+        self.credentials = 'Basic ' + base64.b64encode('{0}:{1}'.format(username, password).encode()).decode()
+        self.sessions = set()
+        self.requests = 0
+        self.users = {}
+        self.add_user({
+            'user-id': username,
+            'full-name': 'Administrator',
+            'user-comments': 'Default administrator',
+            'email': '',
+            'password': '21232F297A57A5A743894A0E4A801FC3',
+            'passwordSalt': False,
+            'duty-schedule': [],
+            'role': ['ROLE_ADMIN']
+        })
+        self.requisitions = {}
+        self.imports = []
+        self.events = []
+        self.nodes = [
+            {
+                'id': str(i),
+                'label': 'node{0}'.format(i),
+                'foreignSource': 'bench{0}'.format(i % 3),
+                'foreignId': str(i),
+                'location': 'Default',
+                'categories': [{'id': 1, 'name': 'Servers'}] if i % 2 else []
+            } for i in range(1, nodes + 1)
+        ]
+
+    def add_user(self, user):
+        self.users[user['user-id']] = user
+
+
+class ONMSRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, avoid the delayed ACK stall
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, session=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        if session is not None:
+            self.send_header('Set-Cookie', 'JSESSIONID={0}; Path=/opennms; HttpOnly'.format(session))
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        if len(data) >= MIN_GZIP_SIZE and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            data = gzip.compress(data)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authenticate(self):
+        """Returns a new session id, None for a valid session or False."""
+        state = self.server.state
+        cookie = self.headers.get('Cookie') or ''
+        for item in cookie.split(';'):
+            name, _, value = item.strip().partition('=')
+            if name == 'JSESSIONID' and value in state.sessions:
+                return None
+
+        if self.server.auth_cost:
+            time.sleep(self.server.auth_cost)
+        if self.headers.get('Authorization') != state.credentials:
+            return False
+        session = uuid.uuid4().hex
+        with state.lock:
+            state.sessions.add(session)
+        return session
+
+    def _page(self, query, items):
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', ['0'])[0]) or len(items)
+        page = items[offset:offset + limit]
+        return page, {'count': len(page), 'totalCount': len(items), 'offset': offset}
+
+    def _handle(self):
+        state = self.server.state
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        with state.lock:
+            state.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if time.time() < self.server.ready_at:
+            # Karaf and the webapp are still starting
+            return self._send(503)
+        if self.headers.get('Content-Encoding') == 'gzip':
+            if not self.server.inflate:
+                return self._send(415)
+            body = gzip.decompress(body)
+
+        session = self._authenticate()
+        if session is False:
+            return self._send(401)
+
+        path = url.path
+        if path == '/opennms/rest/info':
+            return self._send(200, INFO, session)
+
+        if path == '/opennms/rest/health':
+            return self._send(200, HEALTH, session)
+
+        if path == '/opennms/rest/users' and self.command == 'GET':
+            users, metadata = self._page(query, sorted(state.users.values(), key=lambda user: user['user-id']))
+            metadata['user'] = users
+            return self._send(200, metadata, session)
+
+        if path == '/opennms/rest/users' and self.command == 'POST':
+            root = ET.fromstring(body)
+            user = {
+                'user-id': root.findtext('user-id'),
+                'email': root.findtext('email') or '',
+                'password': root.findtext('password'),
+                'passwordSalt': root.findtext('passwordSalt') == 'true',
+                'duty-schedule': [item.text for item in root.findall('duty-schedule')],
+                'role': [item.text for item in root.findall('role')]
+            }
+            for key in ('full-name', 'user-comments'):
+                if root.find(key) is not None:
+                    user[key] = root.findtext(key)
+            with state.lock:
+                state.add_user(user)
+            return self._send(204, session=session)
+
+        if path.startswith('/opennms/rest/users/'):
+            parts = path.split('/')
+            name = parts[4]
+            if name not in state.users:
+                return self._send(404, session=session)
+            user = state.users[name]
+            if len(parts) == 7 and parts[5] == 'roles':
+                with state.lock:
+                    if self.command == 'PUT' and parts[6] not in user['role']:
+                        user['role'].append(parts[6])
+                    elif self.command == 'DELETE' and parts[6] in user['role']:
+                        user['role'].remove(parts[6])
+                return self._send(204, session=session)
+            if self.command == 'GET':
+                return self._send(200, user, session)
+            if self.command == 'PUT':
+                form = parse_qs(body.decode(), keep_blank_values=True)
+                with state.lock:
+                    for key, values in form.items():
+                        field = USER_PROPERTIES.get(key)
+                        if field == 'duty-schedule':
+                            user[field] = [item for item in values[0].split(',') if item]
+                        elif field == 'passwordSalt':
+                            user[field] = values[0] == 'true'
+                        elif field is not None:
+                            user[field] = values[0]
+                return self._send(204, session=session)
+            if self.command == 'DELETE':
+                with state.lock:
+                    del state.users[name]
+                return self._send(204, session=session)
+
+        if path == '/opennms/rest/requisitions' and self.command == 'POST':
+            requisition = requisition_from_xml(body)
+            with state.lock:
+                state.requisitions[requisition['foreign-source']] = requisition
+            return self._send(202, session=session)
+
+        if path.startswith('/opennms/rest/requisitions/'):
+            parts = path.split('/')
+            name = parts[4]
+            if name not in state.requisitions:
+                return self._send(404, session=session)
+            if len(parts) == 6 and parts[5] == 'import' and self.command == 'PUT':
+                with state.lock:
+                    state.imports.append((name, query.get('rescanExisting', ['true'])[0]))
+                return self._send(202, session=session)
+            if self.command == 'GET':
+                return self._send(200, state.requisitions[name], session)
+
+        if path == '/opennms/rest/events' and self.command == 'POST':
+            event = event_from_xml(body)
+            with state.lock:
+                state.events.append(event)
+            return self._send(202, session=session)
+
+        if path == '/opennms/rest/nodes' and self.command == 'GET':
+            nodes, metadata = self._page(query, state.nodes)
+            metadata['node'] = nodes
+            return self._send(200, metadata, session)
+
+        if path == '/opennms/api/v2/nodes' and self.command == 'GET':
+            nodes = state.nodes
+            if '_s' in query:
+                try:
+                    nodes = [node for node in nodes if fiql_match(query['_s'][0], node_properties(node))]
+                except ValueError:
+                    return self._send(400, session=session)
+            nodes, metadata = self._page(query, nodes)
+            if not nodes:
+                # The v2 API has no content instead of an empty list
+                return self._send(204, session=session)
+            metadata['node'] = nodes
+            return self._send(200, metadata, session)
+
+        self._send(404, session=session)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+class ONMSServer(ThreadingHTTPServer):
+    """Serves the stand-in API on 127.0.0.1 from a background thread.
+
+    Parameters
+    ----------
+    port : int, optional
+        Port to listen on (Default is a free port)
+    latency : float, optional
+        Seconds added to every request (Default is 0)
+    auth_cost : float, optional
+        Seconds added to every basic auth request (Default is 0)
+    nodes : int, optional
+        Number of nodes returned by /rest/nodes and /api/v2/nodes (Default is 0)
+    startup : float, optional
+        Seconds every request is answered with 503 after the server is created (Default is 0)
+    inflate : bool, optional
+        Accept gzip compressed request bodies, answer 415 otherwise (Default is True)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, auth_cost=0.0, nodes=0, startup=0.0, inflate=True):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', port), ONMSRequestHandler)
+        self.latency = latency
+        self.auth_cost = auth_cost
+        self.ready_at = time.time() + startup
+        self.inflate = inflate
+        self.state = ONMSState(nodes=nodes)
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}'.format(self.server_address[1])
+
+    def reset(self, nodes=0):
+        """Removes every user, node and session."""
+        self.state = ONMSState(nodes=nodes)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8980)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--auth-cost', type=float, default=0.0, help='seconds added to every basic auth request')
+    parser.add_argument('--nodes', type=int, default=0, help='number of nodes to serve')
+    parser.add_argument('--startup', type=float, default=0.0, help='seconds answered with 503 before the API is ready')
+    parser.add_argument('--no-inflate', dest='inflate', action='store_false', help='answer 415 to compressed request bodies')
+    args = parser.parse_args()
+
+    server = ONMSServer(args.port, args.latency, args.auth_cost, args.nodes, args.startup, args.inflate)
+    print('Serving the OpenNMS REST API on {0}/opennms/rest'.format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()